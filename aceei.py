@@ -1,13 +1,17 @@
 import numpy as np
 import gurobipy as gp
 from gurobipy import GRB
-import numpy as np
-import gurobipy as gp
-from gurobipy import GRB
-import pickle
+from crew import budget_grid, BreakpointSearch
+from demand_pool import SharedDemandPool
+from master_ilp import MasterILP
+from region_store import RegionStore
+from price_update import make_strategy
+from instrumentation import ConsoleObserver, NullTimer, make_timer
 
 class ACEEI:
-    def __init__(self, agents, capacities, budgets0, delta=0.01, epsilon=0.1, t=2, tol=1, max_iter=1000):
+    def __init__(self, agents, capacities, budgets0, delta=0.01, epsilon=0.1, t=2, tol=1, max_iter=1000,
+                 oracle="mip", search="grid", processes=None, cache=None, price_strategy=None,
+                 observers=None):
         self.agents = agents
         self.capacities = capacities
         self.budgets0 = budgets0
@@ -17,9 +21,29 @@ class ACEEI:
         self.max_iter = max_iter
         self.prices = np.zeros_like(self.capacities)
         self.tol = tol
+        self.oracle = oracle              # demand oracle: "mip" or "interval"
+        self.search = search              # subregion search: "grid" or "bisect"
+        self.processes = processes        # MIP demand pool size (None = all cores)
+        self.demand_pool = None
+        self.cache = cache                # optional DemandCache shared across runs
+        self.master = None                # persistent MasterILP during run()
+
+        # price update rule; None keeps p <- p + delta * clip(z)
+        self.price_strategy = make_strategy(price_strategy, delta)
+        self.iterations = 0
+        self.evaluations = 0
+        self.converged = False
+        self.best_error = float("inf")
+
+        # run events go to observers (instrumentation.Observer); default keeps
+        # the console printout, [] runs silently with no timing overhead
+        self.observers = [ConsoleObserver()] if observers is None else list(observers)
+        self.timer = NullTimer()
 
         # Will hold previously discovered constraint pairs
         self.active_constraints = set()     # set of (i, li, j, lj)
+        self.seed_constraints = None        # (i, bundle_i, j, bundle_j) keys to rescreen first
+        self.regions = None                 # RegionStore of the last committed evaluation
         self.full_rescreen_period = 10      # recompute full EF-TB every N iterations
 
 
@@ -34,161 +58,217 @@ class ACEEI:
                 clipped[j] = max(0, z[j])
         return clipped    
 
-    def run(self):
-        best_error = float("inf")
-        best_prices = None
-        best_budgets = None
-        best_bundles = None
-
-        self.prices = np.zeros_like(self.capacities)
-        
-        for iter in range(self.max_iter):
-
-            # -------------------------------------------------------
-            # 1. Enumerate budget subregions
-            # -------------------------------------------------------
-            all_regions = {}
+    def enumerate_subregions(self):
+        """
+        Budget subregions of every agent at the current prices, as a RegionStore.
+        All demand queries of one round go to the shared pool in one batch.
+        """
+        grids = {
+            agent.id: budget_grid(self.budgets0[agent.id], self.delta, self.epsilon)
+            for agent in self.agents
+        }
+
+        if self.search == "grid":
+            queries = [(agent.id, self.prices, grids[agent.id]) for agent in self.agents]
+            results = self.demand_pool.solve_batch(queries)
+            bundles = {agent.id: r for agent, r in zip(self.agents, results)}
             for agent in self.agents:
-                agent_regions = agent.compute_budget_subregions(
-                    self.prices, self.delta, self.epsilon, self.budgets0[agent.id]
-                )
-                all_regions[agent.id] = agent_regions
+                agent.demand_solves += len(grids[agent.id])
+
+        elif self.search == "bisect":
+            searches = {agent.id: BreakpointSearch(len(grids[agent.id])) for agent in self.agents}
+            while True:
+                active = [agent for agent in self.agents if not searches[agent.id].done]
+                if not active:
+                    break
+                idx = {agent.id: searches[agent.id].pending() for agent in active}
+                queries = [(agent.id, self.prices, grids[agent.id][idx[agent.id]])
+                           for agent in active]
+                results = self.demand_pool.solve_batch(queries)
+                for agent, r in zip(active, results):
+                    searches[agent.id].update(idx[agent.id], r)
+                    agent.demand_solves += len(idx[agent.id])
+            bundles = {i: bs.bundles() for i, bs in searches.items()}
+
+        else:
+            raise ValueError(f"unknown subregion search: {self.search}")
+
+        return RegionStore.from_grids(
+            [agent.id for agent in self.agents], grids, bundles, self.delta
+        )
+
+    def run(self, initial_prices=None, should_stop=None, initial_constraints=None):
+        """
+        initial_prices: starting price vector (default: all zeros)
+        should_stop: optional callback (iteration, best_error) -> bool, checked
+                     after every iteration; True ends the run early with the
+                     best iterate so far
+        initial_constraints: EF-TB pairs from an earlier run, as returned by
+                     active_constraint_keys(); when given, the first
+                     iteration rescreens these instead of a full screen
+        """
+        # One worker pool for all agents, closed however the run ends
+        self.demand_pool = SharedDemandPool(self.agents, self.processes, self.oracle, self.cache)
+        # Master ILP persists across iterations and is updated in place
+        self.master = MasterILP(self.capacities)
+        try:
+            return self._run(initial_prices, should_stop, initial_constraints)
+        finally:
+            self.demand_pool.close()
+            self.demand_pool = None
+            self.master.dispose()
+            self.master = None
+
+    def evaluate(self, prices, full_screen=False, commit=True):
+        """
+        One market evaluation at `prices`: subregions, EF-TB screening and
+        the two master ILP solves.
 
-            # -------------------------------------------------------
-            # 2. Build ILP
-            # -------------------------------------------------------
-            m = gp.Model("ACEEI_Budget_Perturbation")
-            m.Params.OutputFlag = 0
+        full_screen: full EF-TB screening instead of rescreening active pairs
+        commit: make `prices` current and keep the new active EF-TB set;
+                False is for scoring candidate prices (price strategies)
 
-            # integral allocation decision variables
-            x = {}
-            for agent in self.agents:
-                i = agent.id
-                for l, subregion in enumerate(all_regions[i]):
-                    x[(i, l)] = m.addVar(vtype=GRB.BINARY, name=f"x_{i}_{l}")
-
-            # clearing variables with pos/neg splits for abs values
-            z = {}
-            z_pos, z_neg = {}, {}
-            for j in range(len(self.capacities)):
-                z[j] = m.addVar(lb=-GRB.INFINITY, name=f"z_{j}")
-                z_pos[j] = m.addVar(name=f"z+_{j}")
-                z_neg[j] = m.addVar(name=f"z-_{j}")
-                m.addConstr(z[j] == z_pos[j] - z_neg[j])
+        Returns dict with z (excess demand), clipped, error, budgets, bundles
+        (plus the regions and EF-TB pairs used, so a candidate can be
+        committed later without solving it again).
+        """
+        saved_prices = self.prices
+        self.prices = prices
+        self.evaluations += 1
+        timer = self.timer
+        timer.count("evaluations")
 
+        try:
             # -------------------------------------------------------
-            # 2a. One subregion per agent
+            # 1. Enumerate budget subregions
             # -------------------------------------------------------
-            for agent in self.agents:
-                i = agent.id
-                m.addConstr(
-                    gp.quicksum(x[(i, l)] for l in range(len(all_regions[i]))) == 1
-                )
+            with timer.phase("enumerate"):
+                regions = self.enumerate_subregions()
+            if commit:
+                self.regions = regions
 
-            # -------------------------------------------------------
-            # 2b. Market clearing
-            # -------------------------------------------------------
-            for j in range(len(self.capacities)):
-                lhs = gp.quicksum(
-                    x[(agent.id, l)] * all_regions[agent.id][l][0][j]
-                    for agent in self.agents 
-                    for l in range(len(all_regions[agent.id]))
-                )
-
-                if self.prices[j] > 0:
-                    m.addConstr(lhs == self.capacities[j] + z[j])
-                else:
-                    m.addConstr(lhs <= self.capacities[j] + z[j])
+            # Seeded pairs from an earlier run are matched by bundle
+            if commit and self.seed_constraints is not None:
+                self.active_constraints = self._constraints_from_keys(regions, self.seed_constraints)
+                self.seed_constraints = None
 
             # -------------------------------------------------------
-            # 2c. EF-TB Constraints (FAST VERSION)
+            # 2. EF-TB Constraints (FAST VERSION)
             # -------------------------------------------------------
             free_mask = (self.prices < 1e-6).astype(int)
 
-            if iter % self.full_rescreen_period == 0:
+            if full_screen:
                 # Full expensive build
-                constrained_pairs = self.screen_eftb_constraints(all_regions, free_mask)
+                with timer.phase("screen_full"):
+                    constrained_pairs = self.screen_eftb_constraints(regions, free_mask)
             else:
                 # Only re-check constraints that were previously binding
-                constrained_pairs = self.rescreen_active_pairs(all_regions, free_mask)
+                with timer.phase("rescreen"):
+                    constrained_pairs = self.rescreen_active_pairs(regions, free_mask)
 
             # Replace active set
-            self.active_constraints = constrained_pairs
-
-            # Add to ILP
-            for (i, li, j, lj) in constrained_pairs:
-                m.addConstr(x[(i, li)] + x[(j, lj)] <= 1)
-
+            if commit:
+                self.active_constraints = constrained_pairs
 
             # -------------------------------------------------------
-            # 2e. Objective
+            # 2a. Update the persistent ILP and solve
             # -------------------------------------------------------
-            m.setObjective(
-                gp.quicksum(z_pos[j] + z_neg[j] for j in range(len(self.capacities))),
-                GRB.MINIMIZE
-            )
-
-            m.optimize()
+            # min clearing error, then min total budget at that error
+            with timer.phase("ilp_update"):
+                self.master.update(regions, constrained_pairs, self.prices)
+            z_sol, chosen = self.master.solve()
+            if timer.enabled:
+                for stats in self.master.solve_stats:
+                    timer.add_time(f"ilp_solve_{stats['phase']}", stats["wall"])
+                timer.solve_stats(self.master.solve_stats)
+                timer.count("regions", len(regions))
+                timer.count("constraints", len(constrained_pairs))
 
             # -------------------------------------------------------
-            # 2f. Solve
+            # 2b. Extract chosen budgets and bundles 
             # -------------------------------------------------------
-            x_sol = {}
-            for agent in self.agents:
-                i = agent.id
-                for l in range(len(all_regions[i])):
-                    x_sol[(i, l)] = x[(i, l)].X
+            with timer.phase("extract"):
+                perturbed_budgets = {}
+                bundles = {}
 
-            z_sol = np.array([z[j].X for j in range(len(self.capacities))])
+                for agent in self.agents:
+                    i = agent.id
+                    chosen_l = chosen.get(i)
 
-            # -------------------------------------------------------
-            # 2g. Re-solve with minimum norm budget
-            # -------------------------------------------------------
-        
-            z_star = m.objVal
+                    assert chosen_l is not None, f"No subregion chosen for agent {i}"
 
-            m.addConstr(
-                gp.quicksum(z_pos[j] + z_neg[j] for j in range(len(self.capacities))) == z_star
-            )
+                    r = regions.row(i, chosen_l)
 
+                    bundles[i] = regions.bundle(r)         # the actual bundle
+                    perturbed_budgets[i] = regions.ends[r] # chosen budget in that subregion
 
-            m.setObjective(
-                gp.quicksum(x[(agent.id,l)] * all_regions[agent.id][l][2]   # region_end = chosen budget
-                            for agent in self.agents
-                            for l in range(len(all_regions[agent.id]))),
-                GRB.MINIMIZE
-            )
+                # if |\tilde z|_2 = 0, terminate with p* = p, b* = b
+                clipped = self.clip(z_sol)
+                clearing_error = np.linalg.norm(clipped)
 
-            m.optimize()
-            
-            # -------------------------------------------------------
-            # 2g. Extract chosen budgets and bundles 
-            # -------------------------------------------------------
-            perturbed_budgets = {}
-            bundles = {}
+        finally:
+            if not commit:
+                self.prices = saved_prices
 
-            for agent in self.agents:
-                i = agent.id
-                chosen_l = None
-                for l in range(len(all_regions[i])):
-                    if x[(i, l)].X > 0.5:     # chosen subregion
-                        chosen_l = l
-                        break
+        return {
+            "z": z_sol,
+            "clipped": clipped,
+            "error": clearing_error,
+            "budgets": perturbed_budgets,
+            "bundles": bundles,
+            "regions": regions,
+            "constraints": constrained_pairs,
+        }
+
+    def _run(self, initial_prices=None, should_stop=None, initial_constraints=None):
+        best_error = float("inf")
+        best_prices = None
+        best_budgets = None
+        best_bundles = None
 
-                assert chosen_l is not None, f"No subregion chosen for agent {i}"
+        if initial_prices is None:
+            self.prices = np.zeros_like(self.capacities, dtype=float)
+        else:
+            self.prices = np.array(initial_prices, dtype=float)
+        self.price_strategy.reset(self.prices)
+        self.iterations = 0
+        self.evaluations = 0
+        self.converged = False
 
-                prev_bundle, region_start, region_end = all_regions[i][chosen_l]
+        self.seed_constraints = initial_constraints
 
-                bundles[i] = np.array(prev_bundle)     # the actual bundle
-                perturbed_budgets[i] = region_end      # chosen budget in that subregion
+        self.timer = make_timer(self.observers)
+        for observer in self.observers:
+            observer.on_run_start(self)
+        demand_solves = sum(agent.demand_solves for agent in self.agents)
+
+        def evaluate_candidate(prices):
+            return self.evaluate(prices, commit=False)
+
+        result = None
+        for iter in range(self.max_iter):
+            self.iterations = iter + 1
 
             # -------------------------------------------------------
-            # 3. Termination check
+            # 1-2. Subregions, EF-TB and master ILP at current prices
             # -------------------------------------------------------
-            # if |\tilde z|_2 = 0, terminate with p* = p, b* = b
-            clipped = self.clip(z_sol)
-            clearing_error = np.linalg.norm(clipped)
+            full_screen = iter % self.full_rescreen_period == 0 and self.seed_constraints is None
+            # search strategies already scored the prices they moved to
+            result = self.price_strategy.reuse(self.prices)
+            if result is not None and not full_screen:
+                self.regions = result["regions"]
+                self.active_constraints = result["constraints"]
+            else:
+                result = self.evaluate(self.prices, full_screen=full_screen)
+            z_sol = result["z"]
+            clipped = result["clipped"]
+            clearing_error = result["error"]
+            perturbed_budgets = result["budgets"]
+            bundles = result["bundles"]
 
+            # -------------------------------------------------------
+            # 3. Termination check
+            # -------------------------------------------------------
             # -------------------------
             # Save best iterate so far
             # -------------------------
@@ -197,30 +277,65 @@ class ACEEI:
                 best_prices = self.prices.copy()
                 best_budgets = perturbed_budgets.copy()
                 best_bundles = {i: bundles[i].copy() for i in bundles}
-
-            if iter % 10 == 0:
-                print(f'== Iteration {iter} ==')
-                print(f'Prices: {self.prices}')
-                print(f'Excess Demand: {z_sol}')
-                print(f'Clipped Excess Demand: {clipped}')
-                print(f'Clearing Error: {clearing_error}\n')
+            self.best_error = best_error
+
+            record = {
+                "iteration": iter,
+                "error": clearing_error,
+                "best_error": best_error,
+                "prices": self.prices,
+                "z": z_sol,
+                "clipped": clipped,
+                "full_screen": full_screen,
+            }
+            if self.timer.enabled:
+                total = sum(agent.demand_solves for agent in self.agents)
+                self.timer.count("demand_solves", total - demand_solves)
+                demand_solves = total
+                record.update(self.timer.drain())
+                record["regions_per_agent"] = np.diff(self.regions.offsets)
+                if self.cache is not None:
+                    record["cache"] = {"hits": self.cache.hits, "misses": self.cache.misses}
+            for observer in self.observers:
+                observer.on_iteration(self, record)
 
             if clearing_error <= self.tol:
-                print(f"== A-CEEI FOUND at iter {iter} ==")
-                print(f'Excess Demand: {z_sol}')
-                print(f'Clipped Excess Demand: {clipped}')
-                print(f'Clearing Error: {clearing_error}')
+                self.converged = True
+                self._end_run("converged", iter, result)
                 return self.prices, perturbed_budgets, bundles
 
+            if should_stop is not None and should_stop(iter, best_error):
+                self._end_run("stopped", iter, result)
+                return best_prices, best_budgets, best_bundles
+
             # -------------------------------------------------------
             # 4. Tatonnement
             # -------------------------------------------------------
-            # p <- p + delta * \tilde z
-            self.prices = self.prices + self.delta * clipped
+            # default: p <- p + delta * \tilde z
+            # (timed into the next iteration's record)
+            with self.timer.phase("price_update"):
+                self.prices = self.price_strategy.step(self.prices, result, evaluate_candidate)
 
-        print("Reached max iterations. Returning best solution found.\n")
+        self._end_run("max_iter", self.max_iter - 1, result)
         return best_prices, best_budgets, best_bundles
 
+    def _end_run(self, status, iter, result):
+        record = {"status": status, "iteration": iter, **self.report()}
+        if result is not None:
+            record.update(z=result["z"], clipped=result["clipped"], error=result["error"])
+        for observer in self.observers:
+            observer.on_run_end(self, record)
+
+    def report(self):
+        """Iterations-to-tolerance summary of the last run()."""
+        return {
+            "strategy": self.price_strategy.name,
+            "converged": self.converged,
+            "iterations": self.iterations,
+            "evaluations": self.evaluations,
+            "best_error": self.best_error,
+        }
+
 
     def violates_eftb_contested_fast(self, agent_i, bundle_i, superbundle_i_j):
         """
@@ -235,64 +350,81 @@ class ACEEI:
 
     def screen_eftb_constraints(self, all_regions, free_mask):
         """
+        all_regions: RegionStore (or agent id -> [(bundle, start, end), ...])
         Returns a set of constraint pairs (i, li, j, lj) that violate contested EF-TB.
-        Runs full O(n^2 * k^2) check but with skipping optimizations.
+        Same test as the pairwise loop, batched: every other agent's regions
+        are stacked into one superbundle matrix and each agent i checks
+        validity, affordability and envy against all of them at once.
         """
+        if not isinstance(all_regions, RegionStore):
+            all_regions = RegionStore.from_regions(all_regions, [agent.id for agent in self.agents])
+        store = all_regions
+
         constrained_pairs = set()
         prices = self.prices
-        priority = self.budgets0
+        priority = np.array([self.budgets0[agent.id] for agent in self.agents])
 
-        for agent_i in self.agents:
-            i = agent_i.id
+        # Stacked regions straight from the store: bundles, region ends, owners
+        B = store.bundle_matrix().astype(float)     # (R, m)
+        ends = store.ends
+        owner = np.array([self.index_of(i) for i in store.agent_ids])[store.owner]
+        local = store.local
 
-            for agent_j in self.agents:
-                j = agent_j.id
-                if i == j:
-                    continue
+        # Contested superbundles and their prices
+        S = np.maximum(B, free_mask)
+        cost_S = S @ prices
 
-                # Only enforce when i has higher priority
-                if priority[i] < priority[j]:
-                    continue
+        # u_i(region bundle) and u_i(superbundle) for every agent and region
+        U = np.array([agent.utilities for agent in self.agents], dtype=float)
+        u_B = U @ B.T                               # (n, R)
+        u_S = U @ S.T                               # (n, R)
 
-                # loops over subregions
-                for li, (bundle_i, bi_lo, bi_hi) in enumerate(all_regions[i]):
-                    ui = agent_i.utility_fast(bundle_i)
-                    bi_budget = bi_hi    # max budget allowed for region
+        # Validity only depends on the agent's conflicts; agents usually share them
+        valid_by_conflicts = {}
+
+        for a, agent_i in enumerate(self.agents):
+            i = agent_i.id
+            rows_i = np.flatnonzero(owner == a)
 
-                    for lj, (bundle_j, bj_lo, bj_hi) in enumerate(all_regions[j]):
-                        
-                        # Build contested superbundle
-                        superbundle = np.maximum(bundle_j, free_mask)
+            key = id(agent_i.conflicts)
+            if key not in valid_by_conflicts:
+                valid_by_conflicts[key] = agent_i.valid_rows(S)
 
-                        # --- Skip Condition A: invalid bundle ---
-                        if not agent_i.valid(superbundle):
-                            continue
+            # Only enforce when i has higher priority
+            cols = (owner != a) & (priority[owner] <= priority[a]) & valid_by_conflicts[key]
 
-                        # --- Skip Condition B: too expensive to afford ---
-                        if prices.dot(superbundle) > bi_budget + 1e-9:
-                            continue
+            affordable = cost_S[None, :] <= ends[rows_i, None] + 1e-9
+            envious = u_S[a][None, :] > u_B[a, rows_i][:, None] + 1e-12
 
-                        # --- Actual contested EF-TB check ---
-                        if self.violates_eftb_contested_fast(agent_i, bundle_i, superbundle):
-                            constrained_pairs.add((i, li, j, lj))
+            li_idx, r_idx = np.nonzero(affordable & envious & cols[None, :])
+            for li, r in zip(local[rows_i[li_idx]], r_idx):
+                constrained_pairs.add((i, int(li), self.agents[owner[r]].id, int(local[r])))
 
         return constrained_pairs
-    
+
     def rescreen_active_pairs(self, all_regions, free_mask):
         """
         Only re-check constraints that were active previously.
         Much cheaper than full screening.
         """
+        if not isinstance(all_regions, RegionStore):
+            all_regions = RegionStore.from_regions(all_regions, [agent.id for agent in self.agents])
+        store = all_regions
+
         new_pairs = set()
         prices = self.prices
-        priority = self.budgets0
 
         for (i, li, j, lj) in self.active_constraints:
 
+            # Region lists may have shrunk since the pair was found
+            if li >= store.n_regions(i) or lj >= store.n_regions(j):
+                continue
+
             # Recompute superbundle
-            bundle_i, bi_lo, bi_hi = all_regions[i][li]
-            bundle_j, bj_lo, bj_hi = all_regions[j][lj]
-            agent_i = self.agents[i]
+            ri, rj = store.row(i, li), store.row(j, lj)
+            bundle_i, bi_hi = store.bundle(ri), store.ends[ri]
+            bundle_j = store.bundle(rj)
+            agent_i = self.agents[self.index_of(i)]
             superbundle = np.maximum(bundle_j, free_mask)
 
             # Check skip rules again
@@ -307,3 +439,35 @@ class ACEEI:
                 new_pairs.add((i, li, j, lj))
 
         return new_pairs
+
+    def active_constraint_keys(self):
+        """
+        Active EF-TB pairs keyed by bundle instead of region index, so they
+        stay meaningful for another run: set of (i, key_i, j, key_j).
+        """
+        if self.regions is None:
+            return set()
+        store = self.regions
+        return {
+            (i, store.key(store.row(i, li)), j, store.key(store.row(j, lj)))
+            for (i, li, j, lj) in self.active_constraints
+        }
+
+    def _constraints_from_keys(self, store, keys):
+        """Map (i, key_i, j, key_j) pairs onto region indices of `store`."""
+        lookup = {}
+        for i in store.agent_ids:
+            for l, r in enumerate(store.rows(i)):
+                lookup.setdefault((i, store.key(r)), l)
+
+        pairs = set()
+        for (i, key_i, j, key_j) in keys:
+            if (i, key_i) in lookup and (j, key_j) in lookup:
+                pairs.add((i, lookup[(i, key_i)], j, lookup[(j, key_j)]))
+        return pairs
+
+    def index_of(self, agent_id):
+        """Position of an agent in self.agents."""
+        if getattr(self, "_index", None) is None or len(self._index) != len(self.agents):
+            self._index = {agent.id: a for a, agent in enumerate(self.agents)}
+        return self._index[agent_id]
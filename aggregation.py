@@ -0,0 +1,197 @@
+"""
+Item-type aggregation for A-CEEI.
+
+Items that every agent values the same and that have the same conflicts
+are interchangeable, so the market only needs one item per type, with the
+summed capacity:
+
+    prices, budgets, bundles, agg = run_aggregated(agents, capacities, budgets0, ...)
+
+which groups the items, runs ACEEI on the type market and maps prices and
+bundles back to items.
+
+Prices, clearing rows, demand models and EF-TB screening all shrink with
+the number of types.
+
+By default only "true twins" are merged: items with equal closed conflict
+neighbourhoods (N(j) + j), which conflict with each other, so no feasible
+bundle holds two items of a type and the reduced market is exact.
+false_twins=True also merges non-conflicting items with equal open
+neighbourhoods (e.g. identical lines without conflicts); the reduced
+demand then lets an agent take at most one item of such a type.
+"""
+import numpy as np
+
+from conflict_graph import ConflictGraph
+from interval_demand import span_times
+
+
+class ItemAggregation:
+    """
+    type_of[j]: type of item j; members[t]: item indices of type t (the
+    first is the representative whose span / conflicts the type uses).
+    """
+
+    def __init__(self, type_of, item_capacities):
+        self.type_of = np.asarray(type_of, dtype=np.int64)
+        self.item_capacities = np.asarray(item_capacities)
+        self.n_types = int(self.type_of.max(initial=-1)) + 1
+
+        order = np.argsort(self.type_of, kind="stable")
+        bounds = np.searchsorted(self.type_of[order], np.arange(self.n_types + 1))
+        self.members = [order[bounds[t]:bounds[t + 1]] for t in range(self.n_types)]
+        self.representatives = np.array([m[0] for m in self.members], dtype=np.int64)
+        self.capacities = np.bincount(self.type_of, weights=self.item_capacities,
+                                      minlength=self.n_types).astype(self.item_capacities.dtype)
+
+    @property
+    def n_items(self):
+        return len(self.type_of)
+
+    # ------------------------------------------------------------
+    # Grouping
+    # ------------------------------------------------------------
+    @classmethod
+    def from_agents(cls, agents, capacities, decimals=None, false_twins=False):
+        """
+        agents: Crew objects (utilities and conflict graphs are compared)
+        decimals: round utilities to this many decimals before comparing,
+                  to merge near-identical items
+        """
+        U = np.array([agent.utilities for agent in agents], dtype=float)
+        if decimals is not None:
+            U = np.round(U, decimals) + 0.0
+        columns = np.ascontiguousarray(U.T)
+        n_items = columns.shape[0]
+
+        # agents usually share one graph; compare each distinct graph once
+        graphs = list({id(agent.graph): agent.graph for agent in agents}.values())
+
+        def neighbourhood_key(j, closed):
+            parts = []
+            for graph in graphs:
+                nb = graph.neighbors(j)
+                if closed:
+                    nb = np.insert(nb, np.searchsorted(nb, j), j)
+                parts.append(nb.tobytes())
+            return b"|".join(parts)
+
+        type_of = np.empty(n_items, dtype=np.int64)
+        keys = {}
+        for j in range(n_items):
+            key = (columns[j].tobytes(), neighbourhood_key(j, closed=True))
+            type_of[j] = keys.setdefault(key, len(keys))
+
+        if false_twins:
+            # merge remaining singletons whose open neighbourhoods agree
+            sizes = np.bincount(type_of)
+            offset = len(keys)
+            keys = {}
+            for j in np.flatnonzero(sizes[type_of] == 1):
+                key = (columns[j].tobytes(), neighbourhood_key(j, closed=False))
+                type_of[j] = offset + keys.setdefault(key, len(keys))
+
+        # number types in order of their first item
+        _, first, inverse = np.unique(type_of, return_index=True, return_inverse=True)
+        rank = np.empty(len(first), dtype=np.int64)
+        rank[np.argsort(first, kind="stable")] = np.arange(len(first))
+        return cls(rank[inverse.ravel()], capacities)
+
+    # ------------------------------------------------------------
+    # Reduced market
+    # ------------------------------------------------------------
+    def reduce_graph(self, graph):
+        """Type-level conflict graph: types conflict when their representatives do."""
+        reps = self.representatives
+        position = np.full(self.n_items, -1, dtype=np.int64)
+        position[reps] = np.arange(self.n_types)
+
+        src = np.repeat(np.arange(self.n_items), graph.degree())
+        keep = (position[src] >= 0) & (position[graph.indices] >= 0)
+        reduced = ConflictGraph.from_edges(self.n_types, position[src[keep]],
+                                           position[graph.indices[keep]])
+        if graph.cliques is not None:
+            cliques = [position[c][position[c] >= 0] for c in graph.cliques]
+            reduced.cliques = [c for c in cliques if len(c) > 1]
+        return reduced
+
+    def reduce_spans(self, spans):
+        if spans is None:
+            return None
+        return {t: span_times(spans[int(j)]) for t, j in enumerate(self.representatives)}
+
+    def reduce_agents(self, agents, budgets0):
+        """
+        Crew over item types (same ids; graphs stay shared).
+        budgets0: initial budgets indexed by agent id, as passed to ACEEI
+        """
+        from crew import Crew
+
+        reduced_graphs = {}
+        out = []
+        for agent in agents:
+            key = id(agent.graph)
+            if key not in reduced_graphs:
+                reduced_graphs[key] = self.reduce_graph(agent.graph)
+            out.append(Crew(agent.id, agent.utilities[self.representatives],
+                            budgets0[agent.id],
+                            conflicts=reduced_graphs[key],
+                            spans=self.reduce_spans(agent.spans)))
+        return out
+
+    # ------------------------------------------------------------
+    # Back to items
+    # ------------------------------------------------------------
+    def expand_prices(self, prices):
+        """Type prices -> item prices."""
+        return np.asarray(prices)[self.type_of]
+
+    def reduce_prices(self, item_prices):
+        """Item prices -> type prices (member mean), e.g. for warm starts."""
+        sums = np.bincount(self.type_of, weights=item_prices, minlength=self.n_types)
+        return sums / np.bincount(self.type_of, minlength=self.n_types)
+
+    def disaggregate(self, bundles, order=None):
+        """
+        bundles: agent id -> type bundle (as returned by ACEEI.run)
+        order: agent ids in the order they get concrete items (default:
+               dict order); each agent takes the member of the type with
+               the most capacity left, so over-demanded types (z > 0)
+               spread their excess evenly over members.
+        Returns agent id -> item bundle (n_items,).
+        """
+        left = np.array(self.item_capacities, dtype=float)
+        out = {}
+        for i in (bundles if order is None else order):
+            x = np.zeros(self.n_items, dtype=int)
+            for t in np.flatnonzero(np.asarray(bundles[i]) > 0):
+                members = self.members[t]
+                j = members[np.argmax(left[members])]
+                x[j] += 1
+                left[j] -= 1
+            out[i] = x
+        return out
+
+
+def run_aggregated(agents, capacities, budgets0, decimals=None, false_twins=False,
+                   initial_prices=None, **aceei_kwargs):
+    """
+    A-CEEI on the item-type market: group, run, disaggregate.
+
+    decimals, false_twins: grouping options (ItemAggregation.from_agents)
+    initial_prices: optional item-level start prices
+    aceei_kwargs: passed to ACEEI (oracle, delta, max_iter, ...)
+
+    Returns (item prices, budgets, item bundles, aggregation). Concrete
+    items are handed out in descending budgets0 order (seniority).
+    """
+    from aceei import ACEEI
+
+    agg = ItemAggregation.from_agents(agents, capacities, decimals, false_twins)
+    aceei = ACEEI(agg.reduce_agents(agents, budgets0), agg.capacities, budgets0, **aceei_kwargs)
+    if initial_prices is not None:
+        initial_prices = agg.reduce_prices(initial_prices)
+    prices, budgets, bundles = aceei.run(initial_prices=initial_prices)
+
+    order = sorted(bundles, key=lambda i: -budgets0[i])
+    return agg.expand_prices(prices), budgets, agg.disaggregate(bundles, order), agg
@@ -0,0 +1,343 @@
+"""
+Scaling benchmarks for the allocation mechanisms, A-CEEI and the metrics.
+
+    python benchmark.py --suite sd metrics --sizes 35 100 300 --save bench.json
+    python benchmark.py --suite aceei --sizes 35 --compare bench.json
+
+Every result is keyed by benchmark name and parameters, so a saved file
+serves as the baseline for later runs; --compare reports the ratio of each
+median time to the baseline and exits non-zero on a regression.
+"""
+import io
+import sys
+import json
+import time
+import argparse
+import platform
+import contextlib
+import numpy as np
+
+import sd as SD
+import metrics as M
+from instrumentation import Observer
+from conflict_graph import ConflictGraph
+
+
+# ------------------------------------------------------------
+# Synthetic instances
+# ------------------------------------------------------------
+def synthetic_lines(n_crew, n_lines, rng):
+    """
+    Random additive utilities (n_crew, n_lines), the preference lists they
+    induce (best line first) and a lines dict {line: {}} as sd.py expects.
+    """
+    U = rng.random((n_crew, n_lines))
+    preferences = np.argsort(-U, axis=1)
+    lines = {j: {} for j in range(n_lines)}
+    return U, preferences, lines
+
+
+def synthetic_pairings(n_items, conflict_density, rng, horizon=1000):
+    """
+    Random pairing spans on [0, horizon]; two pairings conflict when their
+    spans overlap. With uniform starts and length L two spans overlap with
+    probability about 2L / horizon, so L is set from conflict_density.
+    Returns (spans, ConflictGraph).
+    """
+    length = max(1, int(conflict_density * horizon / 2))
+    starts = rng.integers(0, horizon, n_items)
+    ends = starts + length
+    spans = {j: (int(starts[j]), int(ends[j])) for j in range(n_items)}
+    return spans, ConflictGraph.from_spans(spans)
+
+
+def synthetic_market(n_crew, n_items, conflict_density=0.05, budget_spread=0.1, rng=None):
+    """
+    A-CEEI instance: unit capacities, budgets spread linearly over
+    [1, 1 + budget_spread] by seniority. Returns (agents, capacities, budgets0).
+    """
+    from crew import Crew
+
+    if rng is None:
+        rng = np.random.default_rng()
+    spans, conflicts = synthetic_pairings(n_items, conflict_density, rng)
+    U = rng.random((n_crew, n_items))
+    budgets0 = 1.0 + budget_spread * np.linspace(1, 0, n_crew)
+
+    agents = [Crew(i, U[i], budgets0[i], conflicts=conflicts, spans=spans) for i in range(n_crew)]
+    return agents, np.ones(n_items), budgets0
+
+
+# ------------------------------------------------------------
+# Timing
+# ------------------------------------------------------------
+def time_call(fn, repeat=5, warmup=1):
+    """Wall-clock stats of fn() over `repeat` calls after `warmup` untimed ones."""
+    for _ in range(warmup):
+        fn()
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return {
+        "median": float(np.median(times)),
+        "min": float(np.min(times)),
+        "mean": float(np.mean(times)),
+        "repeat": repeat,
+    }
+
+
+def result(name, params, timing, **extra):
+    return {"name": name, "params": params, **timing, **extra}
+
+
+# ------------------------------------------------------------
+# Suites
+# ------------------------------------------------------------
+def bench_sd(sizes, args, rng):
+    out = []
+    for n in sizes:
+        U, P, lines = synthetic_lines(n, n, rng)
+        order = np.arange(n)
+        params = {"n_crew": n, "n_lines": n}
+
+        out.append(result("serial_dictatorship", params, time_call(
+            lambda: SD.serial_dictatorship(P, order, lines), args.repeat)))
+        out.append(result("k_band_serial_dictatorship", {**params, "k": 5}, time_call(
+            lambda: SD.k_band_serial_dictatorship(P, order, lines, 5, rng), args.repeat)))
+        out.append(result("epsilon_serial_dictatorship", {**params, "eps": 2.0}, time_call(
+            lambda: SD.epsilon_serial_dictatorship(P, order, lines, 2.0, rng), args.repeat)))
+    return out
+
+
+def bench_metrics(sizes, args, rng):
+    out = []
+    for n in sizes:
+        U, P, lines = synthetic_lines(n, n, rng)
+        order = np.arange(n)
+        matching = SD.serial_dictatorship(P, order, lines)
+        matches = np.array([matching[i] for i in range(n)])
+        utils = M.utilities_per_crew(matching, U)
+        params = {"n_crew": n}
+
+        out.append(result("total_utility", params, time_call(
+            lambda: M.total_utility(matching, U), args.repeat)))
+        out.append(result("utilities_per_crew", params, time_call(
+            lambda: M.utilities_per_crew(matching, U), args.repeat)))
+        out.append(result("gini", params, time_call(
+            lambda: M.gini(utils), args.repeat)))
+        out.append(result("justified_envy", params, time_call(
+            lambda: M.justified_envy(order, U, matches), args.repeat)))
+
+        A = SD.batched_serial_dictatorship(P, np.array([rng.permutation(n) for _ in range(100)]), lines)
+        batch_utils = U[np.arange(n), A]
+        out.append(result("batched_gini", {**params, "trials": 100}, time_call(
+            lambda: M.batched_gini(batch_utils), args.repeat)))
+        out.append(result("batched_justified_envy", {**params, "trials": 100}, time_call(
+            lambda: M.batched_justified_envy(order, U, A), args.repeat)))
+
+        gen = lambda r: SD.banded_permutation(order, 5, r)
+        out.append(result("displacement_metrics", {**params, "trials": 100}, time_call(
+            lambda: M.displacement_metrics(gen, order, 100, rng), args.repeat)))
+    return out
+
+
+def bench_conflicts(sizes, args, rng):
+    out = []
+    for n in sizes:
+        spans, graph = synthetic_pairings(n, args.conflict_density, rng)
+        bundles = rng.random((1000, n)) < 2.0 / n
+        params = {"n_items": n, "conflict_density": args.conflict_density}
+
+        out.append(result("ConflictGraph.from_spans", params, time_call(
+            lambda: ConflictGraph.from_spans(spans), args.repeat)))
+        out.append(result("ConflictGraph.valid_rows", {**params, "bundles": 1000}, time_call(
+            lambda: graph.valid_rows(bundles), args.repeat)))
+    return out
+
+
+def bench_subregions(sizes, args, rng):
+    out = []
+    for n in sizes:
+        agents, capacities, budgets0 = synthetic_market(
+            1, n, args.conflict_density, args.budget_spread, rng)
+        agent = agents[0]
+        prices = rng.uniform(0, 2.0 / n, n)
+
+        for oracle in args.oracles:
+            for search in ("grid", "bisect"):
+                params = {"n_items": n, "oracle": oracle, "search": search,
+                          "delta": args.delta, "epsilon": args.epsilon,
+                          "conflict_density": args.conflict_density}
+                timing = time_call(lambda: agent.compute_budget_subregions(
+                    prices, args.delta, args.epsilon, budgets0[0], oracle=oracle, search=search),
+                    args.repeat)
+                out.append(result("compute_budget_subregions", params, timing))
+        agent.close()
+    return out
+
+
+class _PhaseCollector(Observer):
+    """Observer summing ACEEI phase timings and counters over a run."""
+
+    wants_timings = True
+
+    def __init__(self):
+        self.phases = {}
+        self.counters = {}
+        self.iterations = 0
+
+    def on_iteration(self, aceei, record):
+        self.iterations += 1
+        for k, v in record["phases"].items():
+            self.phases[k] = self.phases.get(k, 0.0) + v
+        for k, v in record["counters"].items():
+            self.counters[k] = self.counters.get(k, 0) + v
+
+
+def bench_aceei(sizes, args, rng):
+    from aceei import ACEEI
+
+    out = []
+    for n in sizes:
+        n_items = int(round(n * args.items_per_crew))
+        for oracle in args.oracles:
+            seed = int(rng.integers(2**32))
+            params = {"n_crew": n, "n_items": n_items, "oracle": oracle,
+                      "search": args.search, "iterations": args.iterations,
+                      "conflict_density": args.conflict_density,
+                      "budget_spread": args.budget_spread}
+
+            collector = None
+            times = []
+            for _ in range(args.repeat):
+                agents, capacities, budgets0 = synthetic_market(
+                    n, n_items, args.conflict_density, args.budget_spread,
+                    np.random.default_rng(seed))
+                collector = _PhaseCollector()
+                aceei = ACEEI(agents, capacities, budgets0, delta=args.delta,
+                              epsilon=args.epsilon, tol=0, max_iter=args.iterations,
+                              oracle=oracle, search=args.search,
+                              processes=args.processes, observers=[collector])
+                t0 = time.perf_counter()
+                aceei.run()
+                times.append(time.perf_counter() - t0)
+                for agent in agents:
+                    agent.close()
+
+            timing = {"median": float(np.median(times)), "min": float(np.min(times)),
+                      "mean": float(np.mean(times)), "repeat": args.repeat}
+            out.append(result("ACEEI.run", params, timing,
+                              phases=collector.phases, counters=collector.counters))
+    return out
+
+
+SUITES = {
+    "sd": bench_sd,
+    "metrics": bench_metrics,
+    "conflicts": bench_conflicts,
+    "subregions": bench_subregions,
+    "aceei": bench_aceei,
+}
+
+
+# ------------------------------------------------------------
+# Baselines
+# ------------------------------------------------------------
+def result_key(r):
+    return r["name"] + json.dumps(r["params"], sort_keys=True)
+
+
+def compare(results, baseline, threshold=1.25):
+    """
+    Ratio of each median to the baseline's. Returns (rows, regressed) where
+    rows are (key, baseline, current, ratio) and regressed lists the keys
+    slower than threshold x baseline.
+    """
+    base = {result_key(r): r for r in baseline["results"]}
+    rows, regressed = [], []
+    for r in results:
+        key = result_key(r)
+        if key not in base:
+            continue
+        ratio = r["median"] / max(base[key]["median"], 1e-12)
+        rows.append((key, base[key]["median"], r["median"], ratio))
+        if ratio > threshold:
+            regressed.append(key)
+    return rows, regressed
+
+
+def environment():
+    info = {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    try:
+        import gurobipy as gp
+        info["gurobi"] = ".".join(map(str, gp.gurobi.version()))
+    except ImportError:
+        pass
+    return info
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--suite", nargs="+", choices=sorted(SUITES), default=["sd", "metrics"])
+    p.add_argument("--sizes", nargs="+", type=int, default=[35, 100, 300],
+                   help="number of crew (or items, for conflicts and subregions)")
+    p.add_argument("--repeat", type=int, default=5)
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--conflict-density", type=float, default=0.05)
+    p.add_argument("--budget-spread", type=float, default=0.1)
+    p.add_argument("--items-per-crew", type=float, default=1.0)
+    p.add_argument("--oracles", nargs="+", choices=["mip", "interval"], default=["interval"])
+    p.add_argument("--search", choices=["grid", "bisect"], default="bisect")
+    p.add_argument("--iterations", type=int, default=5, help="ACEEI iterations per run")
+    p.add_argument("--delta", type=float, default=0.01)
+    p.add_argument("--epsilon", type=float, default=0.1)
+    p.add_argument("--processes", type=int, default=None)
+    p.add_argument("--save", help="write results as JSON (a baseline for --compare)")
+    p.add_argument("--compare", help="baseline JSON to compare against")
+    p.add_argument("--threshold", type=float, default=1.25,
+                   help="median / baseline ratio counted as a regression")
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    rng = np.random.default_rng(args.seed)
+
+    results = []
+    for suite in args.suite:
+        # keep ACEEI / Gurobi chatter out of the report
+        with contextlib.redirect_stdout(io.StringIO()):
+            rows = SUITES[suite](args.sizes, args, rng)
+        for r in rows:
+            print(f'{r["name"]:<30} {json.dumps(r["params"], sort_keys=True):<90} '
+                  f'{1e3 * r["median"]:>10.3f} ms')
+        results.extend(rows)
+
+    report = {"environment": environment(), "args": vars(args), "results": results}
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        rows, regressed = compare(results, baseline, args.threshold)
+        print(f"\nvs {args.compare}:")
+        for key, old, new, ratio in rows:
+            flag = "  REGRESSION" if key in regressed else ""
+            print(f"{ratio:6.2f}x  {1e3 * old:10.3f} -> {1e3 * new:10.3f} ms  {key}{flag}")
+        if regressed:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
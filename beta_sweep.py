@@ -0,0 +1,154 @@
+import os
+import pickle
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from demand_cache import DemandCache
+
+
+def seniority_budgets(n, beta, ranks=None):
+    """
+    b_i = 1 + beta * (n - rank(i)), rank 1 = most senior.
+    ranks: rank of each agent (default: agent i has rank i + 1)
+    """
+    if ranks is None:
+        ranks = np.arange(1, n + 1)
+    return 1.0 + beta * (n - np.asarray(ranks, dtype=float))
+
+
+# ------------------------------------------------------------
+# Checkpoints: one pickle per solved beta
+# ------------------------------------------------------------
+def checkpoint_path(directory, beta):
+    return os.path.join(directory, f"beta_{float(beta):.6g}.pkl")
+
+
+def save_checkpoint(directory, beta, record):
+    """Write to a temp file and rename, so a killed sweep never leaves a torn file."""
+    path = checkpoint_path(directory, beta)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        pickle.dump(record, f)
+    os.replace(tmp, path)
+
+
+def load_checkpoints(directory, betas=None):
+    """beta -> record for every checkpoint in `directory` (restricted to `betas` if given)."""
+    records = {}
+    if not os.path.isdir(directory):
+        return records
+    for name in os.listdir(directory):
+        if not (name.startswith("beta_") and name.endswith(".pkl")):
+            continue
+        with open(os.path.join(directory, name), "rb") as f:
+            record = pickle.load(f)
+        records[record["beta"]] = record
+
+    if betas is not None:
+        wanted = {float(b) for b in betas}
+        records = {b: r for b, r in records.items() if b in wanted}
+    return records
+
+
+def _next_beta(pending, solved):
+    """
+    Pending beta closest to an already solved one (and that solved beta),
+    so each run is warm-started from the nearest equilibrium available.
+    """
+    if not solved:
+        return pending[0], None
+    return min(
+        ((b, min(solved, key=lambda s: abs(s - b))) for b in pending),
+        key=lambda pair: abs(pair[0] - pair[1])
+    )
+
+
+# ------------------------------------------------------------
+# One chain of betas, run in order with warm starts
+# ------------------------------------------------------------
+def _run_chain(args):
+    """
+    args = (betas, make_aceei, make_args, directory, cache_path, warm)
+    Solves `betas` one by one. Before each run the checkpoint directory is
+    re-read, so chains running in parallel warm-start from each other.
+    """
+    betas, make_aceei, make_args, directory, cache_path, warm = args
+    cache = DemandCache(cache_path) if cache_path is not None else None
+
+    pending = [float(b) for b in betas]
+    done = []
+    try:
+        while pending:
+            solved = load_checkpoints(directory)
+            pending = [b for b in pending if b not in solved]
+            if not pending:
+                break
+
+            beta, source = _next_beta(pending, list(solved) if warm else [])
+            pending.remove(beta)
+
+            aceei = make_aceei(beta, *make_args)
+            if cache is not None:
+                aceei.cache = cache
+
+            initial_prices, initial_constraints = None, None
+            if source is not None:
+                initial_prices = np.array(solved[source]["prices"], dtype=float)
+                initial_constraints = solved[source]["constraints"]
+
+            prices, budgets, bundles = aceei.run(
+                initial_prices=initial_prices, initial_constraints=initial_constraints
+            )
+
+            report = aceei.report()
+            report["warm_from"] = source
+            record = {
+                "beta": beta,
+                "prices": prices,
+                "budgets": budgets,
+                "bundles": bundles,
+                "constraints": aceei.active_constraint_keys(),
+                "report": report,
+            }
+            save_checkpoint(directory, beta, record)
+            done.append(beta)
+    finally:
+        if cache is not None:
+            cache.close()
+
+    return done
+
+
+def run_beta_sweep(make_aceei, betas, directory, make_args=(), cache_path=None,
+                   processes=1, warm=True):
+    """
+    Run A-CEEI for each seniority slope beta, warm-starting every run from
+    the nearest already solved beta (its converged prices and active EF-TB
+    constraints), with all runs sharing one on-disk demand cache.
+
+    make_aceei: picklable top-level function returning a fresh ACEEI for a
+                beta (e.g. with budgets0 = seniority_budgets(n, beta));
+                called as make_aceei(beta, *make_args)
+    directory: checkpoint directory; betas already saved there are skipped,
+               so an interrupted sweep resumes where it stopped
+    cache_path: optional DemandCache file shared by every run
+    processes: number of parallel chains; the sorted betas are split into
+               contiguous chains so most warm starts stay within a chain
+    warm: False runs every beta from zero prices (cold baseline)
+
+    Returns beta -> record dict (prices, budgets, bundles, constraints,
+    report) for every requested beta.
+    """
+    os.makedirs(directory, exist_ok=True)
+    betas = sorted(float(b) for b in betas)
+    pending = [b for b in betas if b not in load_checkpoints(directory, betas)]
+
+    if pending:
+        if processes <= 1 or len(pending) == 1:
+            _run_chain((pending, make_aceei, make_args, directory, cache_path, warm))
+        else:
+            chains = [list(c) for c in np.array_split(pending, min(processes, len(pending)))]
+            tasks = [(c, make_aceei, make_args, directory, cache_path, warm) for c in chains]
+            with ProcessPoolExecutor(max_workers=len(tasks)) as ex:
+                list(ex.map(_run_chain, tasks))
+
+    return load_checkpoints(directory, betas)
@@ -0,0 +1,54 @@
+import numpy as np
+
+
+def pointer_allocate(ranks, orders, n_pairings=None, allowed=None, on_pick=None):
+    """
+    Serial picks against an availability bitmap, for many pick orders at once.
+
+    ranks: (n_crew, L) pairing indices, most preferred first
+    orders: (trials, n_crew) crew indices in picking order, one row per trial
+    allowed: optional (n_crew, n_pairings) bool, pairings a crew may take
+    on_pick: optional callback on_pick(crew, pairing) after every pick
+             position, with the (trials,) crew and pairing (-1) of that pick,
+             e.g. AllocationEvaluator.commit
+
+    Returns a (trials, n_crew) int array: the pairing each crew got, or -1
+    if every pairing on its list was gone. At every pick position all trials
+    advance a pointer into the picking crew's list until it reaches an
+    available pairing, so the Python loop runs over picks, not trials.
+    """
+    ranks = np.asarray(ranks)
+    orders = np.atleast_2d(np.asarray(orders))
+    trials, n_picks = orders.shape
+    n_crew, L = ranks.shape
+    if n_pairings is None:
+        n_pairings = int(ranks.max(initial=-1)) + 1
+
+    available = np.ones((trials, n_pairings), dtype=bool)
+    assignment = np.full((trials, n_crew), -1, dtype=np.int64)
+
+    all_trials = np.arange(trials)
+    ptr = np.zeros(trials, dtype=np.int64)
+    for s in range(n_picks):
+        crew = orders[:, s]
+        ptr[:] = 0
+        active = all_trials
+
+        while len(active):
+            active = active[ptr[active] < L]          # list exhausted: unmatched
+            pairing = ranks[crew[active], ptr[active]]
+            free = available[active, pairing]
+            if allowed is not None:
+                free &= allowed[crew[active], pairing]
+
+            won = active[free]
+            assignment[won, crew[won]] = pairing[free]
+            available[won, pairing[free]] = False
+
+            active = active[~free]
+            ptr[active] += 1
+
+        if on_pick is not None:
+            on_pick(crew, assignment[all_trials, crew])
+
+    return assignment
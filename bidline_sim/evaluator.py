@@ -0,0 +1,175 @@
+import numpy as np
+
+
+class AllocationEvaluator:
+    """
+    Efficiency, fairness and seniority metrics (metrics.md) for a batch of
+    allocations, updated as every pick is committed.
+
+    State is kept in (trials, n_crew) arrays. Committing crew c in a trial
+    touches only c's row and column of the envy relation, so the running
+    totals cost O(n_crew) per pick instead of a recomputation per trial.
+    Crew committed with pairing -1 (nothing left on their list) count as
+    utility 0.
+
+    Welfare, rank sum, envy and monotonicity counts are incremental. gini()
+    and spearman() need the sorted utilities / obtained positions of all
+    crew, so they are computed from the state when called and cached until
+    the next commit.
+
+        ev = AllocationEvaluator(table, trials)
+        pointer_allocate(table.ranks, orders, on_pick=ev.commit)
+        ev.welfare, ev.envy_count, ev.spearman()
+    """
+
+    def __init__(self, table, trials=1):
+        self.table = table
+        self.trials = trials
+        n, m = table.n_crew, table.n_pairings
+
+        # utilities with a trailing 0 column for "unmatched" (pairing -1)
+        self._U = np.concatenate([table.utilities, np.zeros((n, 1))], axis=1)
+        self._UT = np.ascontiguousarray(self._U.T)      # row j = everyone's u(j)
+        # 1-based position of each pairing in each crew's list
+        self._position = np.empty((n, m), dtype=np.int64)
+        self._position[np.arange(n)[:, None], table.ranks] = np.arange(1, m + 1)
+        # seniority position of each crew, 0 = most senior
+        self._seniority = np.empty(n, dtype=np.int64)
+        self._seniority[table.seniority_order()] = np.arange(n)
+
+        self.assignment = np.full((trials, n), -1, dtype=np.int64)
+        self.committed = np.zeros((trials, n), dtype=bool)
+        self.own = np.zeros((trials, n))
+
+        self.welfare = np.zeros(trials)
+        self.rank_sum = np.zeros(trials)
+        self.n_matched = np.zeros(trials, dtype=np.int64)
+        self.envy_count = np.zeros(trials, dtype=np.int64)
+        self.monotonicity_violations = np.zeros(trials, dtype=np.int64)
+        self._cached = {}
+
+    def commit(self, crew, pairing, rows=None):
+        """
+        Record that crew[k] received pairing[k] (-1: nothing) in trial rows[k]
+        (default: trial k). Each crew is committed at most once per trial.
+        """
+        rows = np.arange(self.trials) if rows is None else np.asarray(rows)
+        crew = np.asarray(crew)
+        pairing = np.asarray(pairing)
+        col = np.where(pairing >= 0, pairing, self.table.n_pairings)
+
+        own = self._U[crew, col]
+        others = self.assignment[rows]                                 # (k, n)
+        other_col = np.where(others >= 0, others, self.table.n_pairings)
+        done = self.committed[rows]
+
+        # c envies b: u_c(pairing of b) > u_c(own); b envies c: u_b(j) > u_b(own b)
+        envies = (self._U[crew[:, None], other_col] > own[:, None]) & done
+        envied = (self._UT[col] > self.own[rows]) & done
+
+        senior = self._seniority[None, :] < self._seniority[crew][:, None]   # b senior to c
+        self.envy_count[rows] += envies.sum(axis=1) + envied.sum(axis=1)
+        self.monotonicity_violations[rows] += (envies & ~senior).sum(axis=1) + (envied & senior).sum(axis=1)
+
+        matched = pairing >= 0
+        self.welfare[rows] += own
+        self.rank_sum[rows[matched]] += self._position[crew[matched], pairing[matched]]
+        self.n_matched[rows] += matched
+
+        self.assignment[rows, crew] = pairing
+        self.own[rows, crew] = own
+        self.committed[rows, crew] = True
+        self._cached.clear()
+
+    @classmethod
+    def from_assignment(cls, table, assignment):
+        """Evaluate finished (trials, n_crew) allocations, replayed by seniority."""
+        assignment = np.atleast_2d(assignment)
+        ev = cls(table, len(assignment))
+        for c in table.seniority_order():
+            ev.commit(np.full(ev.trials, c), assignment[:, c])
+        return ev
+
+    # ------------------------------------------------------------
+    # Metrics per trial
+    # ------------------------------------------------------------
+    @property
+    def mean_rank(self):
+        """Mean 1-based list position of the pairings awarded (matched crew)."""
+        return np.divide(self.rank_sum, self.n_matched,
+                         out=np.full(self.trials, np.nan), where=self.n_matched > 0)
+
+    @property
+    def ef1_violations(self):
+        """
+        Envy left after removing one pairing from the envied crew's award.
+        Awards here are single pairings, so removing it always clears the
+        envy: the count is 0 by construction and kept for metrics.md parity.
+        """
+        return np.zeros(self.trials, dtype=np.int64)
+
+    def gini(self):
+        """Gini of crew utilities (unmatched = 0), sort-based."""
+        if "gini" not in self._cached:
+            self._cached["gini"] = self._gini()
+        return self._cached["gini"]
+
+    def _gini(self):
+        x = np.sort(self.own, axis=1)
+        n = x.shape[1]
+        weights = 2 * np.arange(1, n + 1) - n - 1
+        total = x.sum(axis=1)
+        return np.divide(x @ weights, n * total, out=np.zeros(self.trials), where=total != 0)
+
+    def spearman(self):
+        """
+        Spearman rho between seniority position and the list position
+        obtained (unmatched = n_pairings + 1); 1 = fully seniority-monotone.
+        """
+        if "spearman" not in self._cached:
+            self._cached["spearman"] = self._spearman()
+        return self._cached["spearman"]
+
+    def _spearman(self):
+        n = self.table.n_crew
+        obtained = np.full((self.trials, n), self.table.n_pairings + 1.0)
+        matched = self.assignment >= 0
+        t, c = np.nonzero(matched)
+        obtained[t, c] = self._position[c, self.assignment[t, c]]
+
+        x = _average_ranks(np.broadcast_to(self._seniority, obtained.shape).astype(float))
+        y = _average_ranks(obtained)
+        x = x - x.mean(axis=1, keepdims=True)
+        y = y - y.mean(axis=1, keepdims=True)
+        denom = np.sqrt((x * x).sum(axis=1) * (y * y).sum(axis=1))
+        return np.divide((x * y).sum(axis=1), denom, out=np.full(self.trials, np.nan), where=denom > 0)
+
+    def summary(self):
+        """Mean over trials of every metric (and the welfare variance)."""
+        return {
+            "welfare": float(self.welfare.mean()),
+            "welfare_var": float(self.welfare.var(ddof=1)) if self.trials > 1 else 0.0,
+            "mean_rank": float(np.nanmean(self.mean_rank)),
+            "gini": float(self.gini().mean()),
+            "envy_count": float(self.envy_count.mean()),
+            "ef1_violations": float(self.ef1_violations.mean()),
+            "spearman": float(np.nanmean(self.spearman())),
+            "monotonicity_violations": float(self.monotonicity_violations.mean()),
+        }
+
+
+def _average_ranks(x):
+    """Row-wise 1-based ranks with ties averaged, for a (rows, n) array."""
+    rows, n = x.shape
+    order = np.argsort(x, axis=1, kind="stable")
+    s = np.take_along_axis(x, order, axis=1)
+
+    new_group = np.ones((rows, n), dtype=bool)
+    new_group[:, 1:] = s[:, 1:] != s[:, :-1]
+    group = np.cumsum(new_group.ravel()) - 1                   # global group ids
+    position = np.tile(np.arange(1, n + 1, dtype=float), rows)
+    mean_position = np.bincount(group, position) / np.bincount(group)
+
+    ranks = np.empty((rows, n))
+    np.put_along_axis(ranks, order, mean_position[group].reshape(rows, n), axis=1)
+    return ranks
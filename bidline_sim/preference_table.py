@@ -0,0 +1,48 @@
+import numpy as np
+
+
+class PreferenceTable:
+    """
+    Array form of a bid period: crew and pairings are indexed 0..n-1 and
+    0..m-1 (in crew_list / pairings order).
+
+    utilities[c, j]: crew c's preference value for pairing j (0 if absent)
+    ranks[c]: pairing indices, most preferred first (ties keep pairing order,
+              as CrewMember.bid's stable sort does)
+    seniority[c]: lower is more senior
+    """
+
+    def __init__(self, utilities, seniority=None, crew_ids=None, pairing_ids=None):
+        self.utilities = np.asarray(utilities, dtype=float)
+        n, m = self.utilities.shape
+        self.seniority = np.arange(n) if seniority is None else np.asarray(seniority)
+        self.crew_ids = list(range(n)) if crew_ids is None else list(crew_ids)
+        self.pairing_ids = list(range(m)) if pairing_ids is None else list(pairing_ids)
+        self.ranks = np.argsort(-self.utilities, axis=1, kind="stable")
+
+    @classmethod
+    def from_objects(cls, crew_list, pairings):
+        pairing_ids = [p.id for p in pairings]
+        utilities = np.array([[crew.preferences.get(pid, 0) for pid in pairing_ids]
+                              for crew in crew_list], dtype=float).reshape(len(crew_list), len(pairing_ids))
+        return cls(utilities,
+                   seniority=np.array([crew.seniority for crew in crew_list]),
+                   crew_ids=[crew.id for crew in crew_list],
+                   pairing_ids=pairing_ids)
+
+    @property
+    def n_crew(self):
+        return self.utilities.shape[0]
+
+    @property
+    def n_pairings(self):
+        return self.utilities.shape[1]
+
+    def seniority_order(self):
+        """Crew indices, most senior first (stable, as sorted() by seniority)."""
+        return np.argsort(self.seniority, kind="stable")
+
+    def to_allocations(self, assignment):
+        """One row of pairing indices per crew -> {crew id: pairing id}."""
+        return {self.crew_ids[c]: self.pairing_ids[j]
+                for c, j in enumerate(np.asarray(assignment).tolist()) if j >= 0}
@@ -0,0 +1,68 @@
+import numpy as np
+from engine import pointer_allocate
+from rules.allocation_rule import AllocationRule
+
+class ACEEIRule(AllocationRule):
+    """
+    A-CEEI for unit demand: every crew gets a seniority budget
+        b = 1 + beta * (n - rank), rank 1 = most senior,
+    perturbed by U(0, budget_noise), and demands its favourite pairing it can
+    afford. Prices follow tatonnement p <- max(0, p + step * z) on the
+    excess demand z; at the prices with the smallest clearing error, crew
+    pick in seniority order among the pairings they can afford, which
+    settles any remaining over-demand.
+
+    The budget perturbation is the only randomness, so a batch of trials is
+    a batch of perturbed markets.
+    """
+
+    def __init__(self, beta=0.1, budget_noise=0.01, step=0.1, max_iter=500, tol=0.0):
+        self.beta = beta
+        self.budget_noise = budget_noise
+        self.step = step
+        self.max_iter = max_iter
+        self.tol = tol
+
+    def budgets(self, table, rng):
+        ranks = np.empty(table.n_crew)
+        ranks[table.seniority_order()] = np.arange(1, table.n_crew + 1)
+        return 1.0 + self.beta * (table.n_crew - ranks) + self.budget_noise * rng.random(table.n_crew)
+
+    def demand(self, table, prices, budgets):
+        """Favourite affordable pairing of every crew (-1 if none)."""
+        if table.n_pairings == 0:
+            return np.full(table.n_crew, -1)
+        affordable = prices[table.ranks] <= budgets[:, None]
+        first = affordable.argmax(axis=1)
+        return np.where(affordable.any(axis=1), table.ranks[np.arange(table.n_crew), first], -1)
+
+    def clear(self, table, budgets):
+        """Tatonnement; returns the prices with the smallest clearing error."""
+        prices = np.zeros(table.n_pairings)
+        best_prices, best_error = prices, np.inf
+        for _ in range(self.max_iter):
+            x = self.demand(table, prices, budgets)
+            z = np.bincount(x[x >= 0], minlength=table.n_pairings) - 1.0
+            z = np.where((prices <= 0) & (z < 0), 0.0, z)
+            error = np.linalg.norm(z)
+            if error < best_error:
+                best_prices, best_error = prices, error
+            if error <= self.tol:
+                break
+            prices = np.maximum(prices + self.step * z, 0.0)
+        return best_prices
+
+    def allocate_table(self, table, trials=1, rng=None, evaluator=None):
+        if rng is None:
+            rng = np.random.default_rng()
+        order = table.seniority_order()[None, :]
+        out = np.empty((trials, table.n_crew), dtype=np.int64)
+        for t in range(trials):
+            budgets = self.budgets(table, rng)
+            prices = self.clear(table, budgets)
+            allowed = prices[None, :] <= budgets[:, None]
+            on_pick = None
+            if evaluator is not None:
+                on_pick = lambda crew, pairing, t=t: evaluator.commit(crew, pairing, rows=[t])
+            out[t] = pointer_allocate(table.ranks, order, table.n_pairings, allowed, on_pick)[0]
+        return out
@@ -1,4 +1,30 @@
+import numpy as np
+from engine import pointer_allocate
+from preference_table import PreferenceTable
+
+
 class AllocationRule:
-    def allocate(self, crew_list, pairings):
+    """
+    Subclasses either give pick_orders() (serial picks through the pointer
+    engine) or override allocate_table() entirely.
+    """
+
+    def allocate(self, crew_list, pairings, rng=None):
+        """{crew id: pairing id} for one run."""
+        table = PreferenceTable.from_objects(crew_list, pairings)
+        return table.to_allocations(self.allocate_table(table, 1, rng)[0])
+
+    def allocate_table(self, table, trials=1, rng=None, evaluator=None):
+        """
+        (trials, n_crew) pairing index per crew and trial, -1 if unmatched.
+        evaluator: optional AllocationEvaluator(table, trials) fed every pick
+        """
+        if rng is None:
+            rng = np.random.default_rng()
+        orders = self.pick_orders(table, trials, rng)
+        on_pick = evaluator.commit if evaluator is not None else None
+        return pointer_allocate(table.ranks, orders, table.n_pairings, on_pick=on_pick)
+
+    def pick_orders(self, table, trials, rng):
+        """(trials, n_crew) crew indices in picking order."""
         raise NotImplementedError
-    
\ No newline at end of file
@@ -0,0 +1,13 @@
+import numpy as np
+from rules.allocation_rule import AllocationRule
+
+class EpsilonRule(AllocationRule):
+    """Crew pick by seniority rank + eps * N(0, 1) noise."""
+
+    def __init__(self, eps):
+        self.eps = eps
+
+    def pick_orders(self, table, trials, rng):
+        seniority_order = table.seniority_order()
+        perturbed = np.arange(table.n_crew) + self.eps * rng.normal(0, 1, size=(trials, table.n_crew))
+        return seniority_order[np.argsort(perturbed, axis=1)]
@@ -0,0 +1,13 @@
+import numpy as np
+from rules.allocation_rule import AllocationRule
+
+class KBandRule(AllocationRule):
+    """Seniority bands of k crew pick in order; order within a band is random."""
+
+    def __init__(self, k):
+        self.k = k
+
+    def pick_orders(self, table, trials, rng):
+        seniority_order = table.seniority_order()
+        keys = np.arange(table.n_crew) // self.k + rng.random((trials, table.n_crew))
+        return seniority_order[np.argsort(keys, axis=1)]
@@ -1,18 +1,6 @@
+import numpy as np
 from rules.allocation_rule import AllocationRule
 
 class SeniorRule(AllocationRule):
-    def allocate(self, crew_list, pairings):
-        crew_sorted = sorted(crew_list, key=lambda c: c.seniority)
-
-        available = {p.id: p for p in pairings}
-        allocations = {}
-
-        for crew in crew_sorted:
-            bids = crew.bid(available.values())
-            for pairing in bids:
-                if pairing.id in available:
-                    allocations[crew.id] = pairing.id
-                    del available[pairing.id]
-                    break
-        
-        return allocations
\ No newline at end of file
+    def pick_orders(self, table, trials, rng):
+        return np.tile(table.seniority_order(), (trials, 1))
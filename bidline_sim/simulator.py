@@ -1,15 +1,69 @@
+import numpy as np
+from preference_table import PreferenceTable
+from evaluator import AllocationEvaluator
+
+
 class BidlineSimulator:
     def __init__(self, crew_list, pairings, rule):
         self.crew_list = crew_list
         self.pairings = pairings
         self.rule = rule
         self.allocations = None
+        self.batch = None
+        self.evaluator = None
+        self._table = None
+
+    @property
+    def table(self):
+        """PreferenceTable (rank arrays) of the bid period, built once."""
+        if self._table is None:
+            self._table = PreferenceTable.from_objects(self.crew_list, self.pairings)
+        return self._table
+
+    def run(self, seed=None, evaluate=False):
+        self.run_batch(1, seed, evaluate)
+        self.allocations = self.table.to_allocations(self.batch[0])
+
+    def run_batch(self, trials, seed=None, evaluate=False):
+        """
+        `trials` allocations in one call, seeded by `seed`. Returns (and
+        keeps in self.batch) a (trials, n_crew) array of pairing indices
+        into self.pairings, -1 for unmatched crew.
+        evaluate: score every pick as it is committed (self.evaluator).
+                  Off by default: it costs O(n_crew) per pick, and the
+                  evaluate_* methods score the finished batch on demand.
+        """
+        self.evaluator = AllocationEvaluator(self.table, trials) if evaluate else None
+        self.batch = self.rule.allocate_table(self.table, trials, np.random.default_rng(seed),
+                                              evaluator=self.evaluator)
+        return self.batch
 
-    def run(self):
-        self.allocations = self.rule.allocate(self.crew_list, self.pairings)
+    def _evaluator(self):
+        if self.evaluator is None:
+            if self.batch is None:
+                raise RuntimeError("run() or run_batch() first")
+            self.evaluator = AllocationEvaluator.from_assignment(self.table, self.batch)
+        return self.evaluator
 
     def evaluate_fairness(self, metric="envy"):
-        pass
+        """
+        Per-trial fairness of the last run / batch.
+        metric: "envy" (envious crew pairs), "ef1", "gini", "spearman" or
+                "monotonicity" (senior crew envying a junior's pairing)
+        """
+        ev = self._evaluator()
+        metrics = {
+            "envy": lambda: ev.envy_count,
+            "ef1": lambda: ev.ef1_violations,
+            "gini": ev.gini,
+            "spearman": ev.spearman,
+            "monotonicity": lambda: ev.monotonicity_violations,
+        }
+        if metric not in metrics:
+            raise ValueError(f"unknown fairness metric: {metric}")
+        return metrics[metric]()
 
     def evaluate_efficiency(self):
-        pass
\ No newline at end of file
+        """Per-trial total welfare and mean awarded list position."""
+        ev = self._evaluator()
+        return {"welfare": ev.welfare, "mean_rank": ev.mean_rank}
@@ -0,0 +1,193 @@
+import heapq
+import numpy as np
+from interval_demand import span_times, _span_key
+from region_store import pack_bundles
+
+
+class ConflictGraph:
+    """
+    Item conflict graph in CSR form.
+
+    Item j's neighbours are indices[indptr[j]:indptr[j+1]] (sorted). Each
+    item also has a packed uint64 neighbour mask (see region_store), so a
+    bundle is checked with word ANDs instead of a scan of the pair list.
+
+    Graphs built from spans also keep the maximal cliques of the interval
+    graph; one clique row sum_{j in C} x_j <= 1 replaces all pairwise rows
+    inside C in the demand MIPs.
+    """
+
+    def __init__(self, n_items, indptr, indices, cliques=None):
+        self.n_items = n_items
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int64)
+        self.cliques = cliques
+        self._pairs = None
+        self._masks = None
+        self._matrix = None
+
+    # ------------------------------------------------------------
+    # Construction
+    # ------------------------------------------------------------
+    @classmethod
+    def from_edges(cls, n_items, u, v, cliques=None):
+        """Symmetric CSR from an undirected edge list (u[e], v[e])."""
+        u = np.asarray(u, dtype=np.int64)
+        v = np.asarray(v, dtype=np.int64)
+        keep = u != v
+        # both directions, sorted and deduplicated as one int64 key
+        key = np.sort(np.concatenate([u[keep] * n_items + v[keep],
+                                      v[keep] * n_items + u[keep]]))
+        key = key[np.r_[True, key[1:] != key[:-1]]] if len(key) else key
+        src, dst = np.divmod(key, n_items)
+
+        indptr = np.zeros(n_items + 1, dtype=np.int64)
+        np.add.at(indptr, src + 1, 1)
+        return cls(n_items, np.cumsum(indptr), dst, cliques)
+
+    @classmethod
+    def from_pairs(cls, n_items, pairs):
+        """pairs: iterable of (j, k) conflicting items (Crew.conflicts format)."""
+        pairs = np.array(list(pairs), dtype=np.int64).reshape(-1, 2)
+        return cls.from_edges(n_items, pairs[:, 0], pairs[:, 1])
+
+    @classmethod
+    def from_spans(cls, spans, n_items=None):
+        """
+        Items conflict when their spans overlap (end_j > start_k and
+        end_k > start_j). Sort by start, then every item's neighbours to the
+        right are the items starting before it ends: O(n log n + edges).
+        """
+        if n_items is None:
+            n_items = len(spans)
+        starts = np.empty(n_items)
+        ends = np.empty(n_items)
+        for j in range(n_items):
+            s, e = span_times(spans[j])
+            starts[j], ends[j] = _span_key(s), _span_key(e)
+
+        order = np.argsort(starts, kind="stable")
+        s_sorted, e_sorted = starts[order], ends[order]
+
+        # items after position a that start strictly before item a ends
+        hi = np.searchsorted(s_sorted, e_sorted, side="left")
+        counts = np.maximum(hi - np.arange(n_items) - 1, 0)
+
+        a = np.repeat(np.arange(n_items), counts)
+        offsets = np.cumsum(counts) - counts
+        b = a + 1 + np.arange(counts.sum()) - np.repeat(offsets, counts)
+
+        # equal starts can pair an empty span with one it only touches
+        overlap = (e_sorted[b] > s_sorted[a]) & (e_sorted[a] > s_sorted[b])
+        a, b = a[overlap], b[overlap]
+
+        return cls.from_edges(n_items, order[a], order[b],
+                              cliques=_interval_cliques(s_sorted, e_sorted, order))
+
+    # ------------------------------------------------------------
+    # Views
+    # ------------------------------------------------------------
+    @property
+    def n_edges(self):
+        return len(self.indices) // 2
+
+    def neighbors(self, j):
+        return self.indices[self.indptr[j]:self.indptr[j + 1]]
+
+    def degree(self):
+        return np.diff(self.indptr)
+
+    def pairs(self):
+        """[(j, k), ...] with j < k, cached (the Crew.conflicts format)."""
+        if self._pairs is None:
+            src = np.repeat(np.arange(self.n_items), self.degree())
+            upper = src < self.indices
+            self._pairs = list(zip(src[upper].tolist(), self.indices[upper].tolist()))
+        return self._pairs
+
+    def masks(self):
+        """(n_items, n_words) packed neighbour masks, cached."""
+        if self._masks is None:
+            masks = np.zeros((self.n_items, max(1, -(-self.n_items // 64))), dtype=np.uint64)
+            src = np.repeat(np.arange(self.n_items), self.degree())
+            bits = np.left_shift(np.uint64(1), (self.indices & 63).astype(np.uint64))
+            np.bitwise_or.at(masks, (src, self.indices >> 6), bits)
+            self._masks = masks
+        return self._masks
+
+    def matrix(self):
+        """Dense 0/1 adjacency as float (n_items, n_items), cached."""
+        if self._matrix is None:
+            A = np.zeros((self.n_items, self.n_items))
+            A[np.repeat(np.arange(self.n_items), self.degree()), self.indices] = 1
+            self._matrix = A
+        return self._matrix
+
+    def constraint_sets(self):
+        """
+        Item sets of which a feasible bundle holds at most one: the maximal
+        cliques for interval graphs, otherwise the edges.
+        """
+        if self.cliques is not None:
+            return self.cliques
+        return [np.array(p) for p in self.pairs()]
+
+    # ------------------------------------------------------------
+    # Validity
+    # ------------------------------------------------------------
+    def valid(self, bundle):
+        """True if no two items of the 0/1 bundle conflict."""
+        items = np.flatnonzero(bundle)
+        if len(items) < 2 or self.n_edges == 0:
+            return True
+        packed = pack_bundles(np.asarray(bundle) != 0, self.masks().shape[1])[0]
+        return not np.any(self.masks()[items] & packed)
+
+    def valid_rows(self, bundles):
+        """Vectorized valid(): bundles is (R, n_items); returns (R,) bool."""
+        bundles = np.asarray(bundles) != 0
+        ok = np.ones(len(bundles), dtype=bool)
+        if self.n_edges == 0:
+            return ok
+
+        masks = self.masks()
+        packed = pack_bundles(bundles, masks.shape[1])
+        for j in np.flatnonzero(self.degree() > 0):
+            rows = np.flatnonzero(bundles[:, j] & ok)
+            if len(rows):
+                ok[rows] &= ~np.any(packed[rows] & masks[j], axis=1)
+        return ok
+
+
+def _interval_cliques(s_sorted, e_sorted, order):
+    """
+    Maximal cliques of an interval graph: the items alive at a start time t
+    form one unless they all outlive the next start time. None if some span
+    is empty (it overlaps spans without being alive at any start time).
+
+    The live set is a heap on end time updated as the sweep advances, so the
+    cost is O(n log n) plus the total size of the cliques emitted.
+    """
+    if np.any(e_sorted <= s_sorted):
+        return None
+    times = np.unique(s_sorted)
+    upto = np.searchsorted(s_sorted, times, side="right")
+    cliques = []
+    live = []                                   # (end, position in start order)
+    a = 0
+    for k, t in enumerate(times):
+        for b in range(a, upto[k]):
+            heapq.heappush(live, (e_sorted[b], b))
+        a = upto[k]
+        while live[0][0] <= t:
+            heapq.heappop(live)
+        if len(live) < 2:
+            continue
+        if k + 1 == len(times) or live[0][0] <= times[k + 1]:
+            cliques.append(order[np.sort([b for _, b in live])])
+    return cliques
+
+
+def conflicts_from_spans(spans):
+    """Sweep-line replacement for the notebook's compute_conflicts_from_spans."""
+    return ConflictGraph.from_spans(spans).pairs()
@@ -2,20 +2,32 @@ import numpy as np
 import gurobipy as gp
 from gurobipy import GRB
 from demand_pool import DemandPool
+from region_store import bundle_key
+from conflict_graph import ConflictGraph
 
 gp.setParam('LogToConsole', 0)
 
 class Crew:
-    def __init__(self, id, utilities, budget0, conflicts=None):
+    def __init__(self, id, utilities, budget0, conflicts=None, spans=None):
         """
         utilities[j]: utility of item j
         budget0: initial budget b_i^0
-        conflicts: list of (j,k) item pairs that cannot be taken together
+        conflicts: list of (j,k) item pairs that cannot be taken together,
+                   or a ConflictGraph (share one graph across agents)
+        spans: optional (start_j, end_j) per item; when conflicts are exactly
+               the overlapping spans this enables the "interval" demand oracle
         """
         self.id = id
         self.utilities = np.array(utilities)
         self.n_items = len(utilities)
-        self.conflicts = conflicts if conflicts is not None else []
+        if isinstance(conflicts, ConflictGraph):
+            self.graph = conflicts
+            self.conflicts = conflicts.pairs()
+        else:
+            self.conflicts = conflicts if conflicts is not None else []
+            self.graph = ConflictGraph.from_pairs(self.n_items, self.conflicts)
+        self.spans = spans
+        self.demand_solves = 0    # number of demand oracle calls so far
 
         # -------------------------------
         # Build a persistent knapsack MIP
@@ -38,9 +50,9 @@ class Crew:
 
         self.budget_constr = m.addConstr(self.price_expr <= budget0)
 
-        # add conflict constraints once
-        for (j, k) in self.conflicts:
-            m.addConstr(self.x[j] + self.x[k] <= 1)
+        # add conflict constraints once (clique rows for interval graphs)
+        for items in self.graph.constraint_sets():
+            m.addConstr(gp.quicksum(self.x[j] for j in items) <= 1)
 
         m.update()
         self.model = m
@@ -56,52 +68,173 @@ class Crew:
 
     def valid(self, bundle):
         """Check if bundle violates conflicts."""
-        for j, k in self.conflicts:
-            if bundle[j] == 1 and bundle[k] == 1:
-                return False
-        return True
+        return self.graph.valid(bundle)
+
+    def conflict_matrix(self):
+        """Dense 0/1 conflict adjacency (n_items x n_items), built once."""
+        return self.graph.matrix()
+
+    def valid_rows(self, bundles):
+        """Vectorized valid(): bundles is (R, n_items); returns (R,) bool."""
+        return self.graph.valid_rows(bundles)
 
 
     # ============================================================
     #   Subregion computation (unchanged logic, faster demand())
     # ============================================================
 
-    def compute_budget_subregions(self, prices, delta, epsilon, budget0):
-
-        b_min = budget0 - epsilon
-        b_max = budget0 + epsilon
-        budgets = np.arange(b_min, b_max + 1e-12, delta)
-
-        # Parallel demand using persistent workers
-        if not hasattr(self, "demand_pool"):
-            self.demand_pool = DemandPool(
-                utilities=self.utilities,
-                conflicts=self.conflicts,
-                processes=8   # choose appropriate number
-            )
-
-        bundles_list = self.demand_pool.solve_many(prices, budgets)
-
-        # Build subregions as before
-        regions = []
-        prev_bundle = None
-        region_start = None
-
-        for b, bundle in zip(budgets, bundles_list):
-            bundle_tuple = tuple(bundle)
+    def compute_budget_subregions(self, prices, delta, epsilon, budget0, oracle="mip",
+                                  search="grid", demand_pool=None, cache=None):
+        """
+        oracle: "mip" (Gurobi knapsack) or "interval" (exact interval DP,
+                requires spans)
+        search: "grid"   -> solve demand at every budget of the delta grid
+                "bisect" -> only probe the grid where the bundle changes
+                            (same regions, far fewer demand solves)
+        demand_pool: optional SharedDemandPool serving all agents; otherwise
+                     the agent lazily creates its own DemandPool
+        cache: optional DemandCache for the agent's own DemandPool
+        """
 
-            if prev_bundle is None:
-                prev_bundle = bundle_tuple
-                region_start = b
+        budgets = budget_grid(budget0, delta, epsilon)
+
+        if demand_pool is not None:
+            def solve_many(bs):
+                return demand_pool.solve_many(self.id, prices, bs)
+        else:
+            # Parallel demand using persistent workers
+            if getattr(self, "demand_pool", None) is None or self.demand_pool.oracle != oracle:
+                self.close()
+                self.demand_pool = DemandPool(
+                    utilities=self.utilities,
+                    conflicts=self.graph,
+                    processes=8,   # choose appropriate number
+                    oracle=oracle,
+                    spans=self.spans
+                )
+            self.demand_pool.cache = cache
+
+            def solve_many(bs):
+                return self.demand_pool.solve_many(prices, bs)
+
+        if search == "grid":
+            bundles_list = solve_many(budgets)
+            self.demand_solves += len(budgets)
+        elif search == "bisect":
+            bs = BreakpointSearch(len(budgets))
+            while not bs.done:
+                idx = bs.pending()
+                bs.update(idx, solve_many(budgets[idx]))
+                self.demand_solves += len(idx)
+            bundles_list = bs.bundles()
+        else:
+            raise ValueError(f"unknown subregion search: {search}")
+
+        return build_regions(budgets, bundles_list, delta)
+
+    def close(self):
+        """Shut down the agent's private DemandPool, if any."""
+        if getattr(self, "demand_pool", None) is not None:
+            self.demand_pool.close()
+            self.demand_pool = None
+
+
+def budget_grid(budget0, delta, epsilon):
+    """Budgets b0 - epsilon, ..., b0 + epsilon in steps of delta."""
+    b_min = budget0 - epsilon
+    b_max = budget0 + epsilon
+    return np.arange(b_min, b_max + 1e-12, delta)
+
+
+def build_regions(budgets, bundles_list, delta):
+    """Merge consecutive grid budgets with equal bundles into (bundle, start, end)."""
+    regions = []
+    prev_bundle = None
+    region_start = None
+
+    prev_key = None
+
+    for b, bundle in zip(budgets, bundles_list):
+        key = bundle_key(bundle)     # packed bytes, cheap to compare
+
+        if prev_key is None:
+            prev_bundle, prev_key = bundle, key
+            region_start = b
+            continue
+
+        if key != prev_key:
+            regions.append((np.array(prev_bundle, dtype=int),
+                            region_start, b - delta))
+            prev_bundle, prev_key = bundle, key
+            region_start = b
+
+    regions.append((np.array(prev_bundle, dtype=int),
+                    region_start, budgets[-1]))
+
+    return regions
+
+
+class BreakpointSearch:
+    """
+    Locates demand breakpoints on a budget grid of n points by bisection.
+
+    Demand utility is non-decreasing in the budget, so if the same bundle is
+    optimal at both ends of a grid segment it is optimal everywhere inside it;
+    only segments whose end bundles differ are split. Probes are handed out a
+    whole bisection level at a time so they can go through one solve_many().
+
+        bs = BreakpointSearch(len(budgets))
+        while not bs.done:
+            idx = bs.pending()
+            bs.update(idx, solve_many(prices, budgets[idx]))
+        bundles_list = bs.bundles()
+    """
+
+    def __init__(self, n):
+        self.n = n
+        self.keys = [None] * n
+        self.solved = {}                      # grid index -> bundle
+        self.segments = []                    # (lo, hi) with both ends solved
+        self._pending = sorted({0, n - 1}) if n > 0 else []
+
+    @property
+    def done(self):
+        return not self._pending
+
+    def pending(self):
+        """Grid indices to probe next."""
+        return np.array(self._pending, dtype=int)
+
+    def update(self, indices, bundles):
+        for k, bundle in zip(indices, bundles):
+            self.solved[int(k)] = bundle
+            self.keys[int(k)] = bundle_key(bundle)
+
+        if not self.segments and self.n > 1:
+            self.segments = [(0, self.n - 1)]
+
+        next_segments = []
+        self._pending = []
+        for lo, hi in self.segments:
+            if hi - lo <= 1 or self.keys[lo] == self.keys[hi]:
                 continue
-
-            if bundle_tuple != prev_bundle:
-                regions.append((np.array(prev_bundle, dtype=int),
-                                region_start, b - delta))
-                prev_bundle = bundle_tuple
-                region_start = b
-
-        regions.append((np.array(prev_bundle, dtype=int),
-                        region_start, budgets[-1]))
-
-        return regions
\ No newline at end of file
+            mid = (lo + hi) // 2
+            if mid not in self.solved:
+                self._pending.append(mid)
+            next_segments += [(lo, mid), (mid, hi)]
+
+        # segments are split only once their midpoint has been solved
+        if self._pending:
+            self.segments = next_segments
+        else:
+            self.segments = []
+
+    def bundles(self):
+        """Bundle at every grid index, filling agreeing segments from their ends."""
+        out = [None] * self.n
+        last = None
+        for k in range(self.n):
+            if k in self.solved:
+                last = self.solved[k]
+            out[k] = last
+        return out
@@ -0,0 +1,254 @@
+import os
+import time
+import sqlite3
+import hashlib
+import numpy as np
+
+
+class DemandCache:
+    """
+    Content-addressed on-disk cache of demand bundles.
+
+    An entry is keyed by a hash of the agent (utilities, conflicts, oracle)
+    plus the quantized price vector and budget, so identical queries from
+    repeated runs, beta sweeps or different worker processes share results.
+    Entries live in a SQLite file (safe for concurrent processes); when the
+    stored bundles exceed max_bytes the least recently used ones are evicted.
+
+    hits / misses count lookups made through this object; stats() also
+    returns the totals accumulated in the file by every process that used it.
+
+    Lookups only read (WAL readers do not block each other); their LRU
+    touches and hit/miss counts are buffered and written with the next
+    put_many, or once touch_batch keys are pending.
+    """
+
+    def __init__(self, path, max_bytes=256 * 2**20, decimals=9, touch_batch=4096):
+        """
+        path: SQLite file, created if missing
+        max_bytes: size bound on stored bundles
+        decimals: prices and budgets are rounded to this many decimals
+        touch_batch: pending LRU touches that force a write from get_many
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.decimals = decimals
+        self.touch_batch = touch_batch
+        self.hits = 0
+        self.misses = 0
+        self._conn = None
+        self._pid = None
+        self._reset_pending()
+
+        self._connect()
+
+    # ------------------------------------------------------------
+    # Connection (one per process; re-opened after fork/pickle)
+    # ------------------------------------------------------------
+    def _connect(self):
+        if self._conn is not None and self._pid == os.getpid():
+            return self._conn
+
+        conn = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("""CREATE TABLE IF NOT EXISTS entries (
+                            key TEXT PRIMARY KEY,
+                            n INTEGER,
+                            bundle BLOB,
+                            size INTEGER,
+                            last_used REAL)""")
+        conn.execute("CREATE INDEX IF NOT EXISTS entries_lru ON entries(last_used)")
+        conn.execute("""CREATE TABLE IF NOT EXISTS stats (
+                            name TEXT PRIMARY KEY,
+                            value INTEGER)""")
+        conn.execute("INSERT OR IGNORE INTO stats VALUES ('hits', 0), ('misses', 0), ('bytes', 0)")
+
+        self._conn = conn
+        self._pid = os.getpid()
+        return conn
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_conn"] = None
+        state["_pid"] = None
+        state.update(_touched={}, _pending_hits=0, _pending_misses=0)
+        return state
+
+    def _reset_pending(self):
+        self._touched = {}
+        self._pending_hits = 0
+        self._pending_misses = 0
+
+    # ------------------------------------------------------------
+    # Keys
+    # ------------------------------------------------------------
+    @staticmethod
+    def agent_fingerprint(utilities, conflicts, oracle="mip"):
+        """Hash identifying an agent's demand problem up to prices/budget."""
+        h = hashlib.sha256()
+        h.update(oracle.encode())
+        h.update(np.ascontiguousarray(utilities, dtype=np.float64).tobytes())
+        pairs = sorted((min(j, k), max(j, k)) for j, k in conflicts)
+        h.update(np.array(pairs, dtype=np.int64).tobytes())
+        return h.hexdigest()
+
+    def _keys(self, fingerprint, prices, budgets):
+        base = hashlib.sha256()
+        base.update(fingerprint.encode())
+        q_prices = np.round(np.asarray(prices, dtype=np.float64), self.decimals) + 0.0
+        base.update(q_prices.tobytes())
+
+        keys = []
+        for b in budgets:
+            h = base.copy()
+            h.update(repr(round(float(b), self.decimals) + 0.0).encode())
+            keys.append(h.hexdigest())
+        return keys
+
+    # ------------------------------------------------------------
+    # Lookup / store
+    # ------------------------------------------------------------
+    def get_many(self, fingerprint, prices, budgets):
+        """Cached bundle for each budget, or None where missing."""
+        conn = self._connect()
+        keys = self._keys(fingerprint, prices, budgets)
+
+        # deferred transaction: a read snapshot, no write lock
+        found = {}
+        conn.execute("BEGIN DEFERRED")
+        try:
+            for s in range(0, len(keys), 500):
+                chunk = keys[s:s + 500]
+                rows = conn.execute(
+                    f"SELECT key, n, bundle FROM entries WHERE key IN ({','.join('?' * len(chunk))})",
+                    chunk
+                ).fetchall()
+                for key, n, blob in rows:
+                    found[key] = np.unpackbits(np.frombuffer(blob, dtype=np.uint8), count=n).astype(int)
+        finally:
+            conn.execute("COMMIT")
+
+        hits = sum(k in found for k in keys)
+        misses = len(keys) - hits
+        self.hits += hits
+        self.misses += misses
+
+        now = time.time()
+        self._touched.update((k, now) for k in found)
+        self._pending_hits += hits
+        self._pending_misses += misses
+        if len(self._touched) >= self.touch_batch:
+            self.flush()
+
+        return [found.get(k) for k in keys]
+
+    def flush(self):
+        """Write buffered LRU touches and hit/miss counts."""
+        if not self._touched and not (self._pending_hits or self._pending_misses):
+            return
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._write_pending(conn)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _write_pending(self, conn):
+        """Apply buffered touches and counts (inside a write transaction)."""
+        conn.executemany("UPDATE entries SET last_used = ? WHERE key = ?",
+                         [(t, k) for k, t in self._touched.items()])
+        conn.execute("UPDATE stats SET value = value + ? WHERE name = 'hits'", (self._pending_hits,))
+        conn.execute("UPDATE stats SET value = value + ? WHERE name = 'misses'", (self._pending_misses,))
+        self._reset_pending()
+
+    def put_many(self, fingerprint, prices, budgets, bundles):
+        conn = self._connect()
+        keys = self._keys(fingerprint, prices, budgets)
+        now = time.time()
+
+        rows = []
+        for key, bundle in zip(keys, bundles):
+            bundle = np.asarray(bundle)
+            blob = np.packbits(bundle.astype(np.uint8)).tobytes()
+            rows.append((key, len(bundle), blob, len(blob), now))
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # touches first, so eviction sees the entries just read
+            self._write_pending(conn)
+            added = 0
+            for row in rows:
+                cur = conn.execute("INSERT OR IGNORE INTO entries VALUES (?, ?, ?, ?, ?)", row)
+                added += row[3] * cur.rowcount
+            conn.execute("UPDATE stats SET value = value + ? WHERE name = 'bytes'", (added,))
+            self._evict(conn)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _evict(self, conn):
+        """Drop least recently used entries until under max_bytes (inside a transaction)."""
+        total = conn.execute("SELECT value FROM stats WHERE name = 'bytes'").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        # evict down to 90% so we do not evict on every put
+        target = int(0.9 * self.max_bytes)
+        freed = 0
+        victims = []
+        for key, size in conn.execute("SELECT key, size FROM entries ORDER BY last_used"):
+            if total - freed <= target:
+                break
+            victims.append((key,))
+            freed += size
+
+        conn.executemany("DELETE FROM entries WHERE key = ?", victims)
+        conn.execute("UPDATE stats SET value = value - ? WHERE name = 'bytes'", (freed,))
+
+    # ------------------------------------------------------------
+    # Reporting
+    # ------------------------------------------------------------
+    def stats(self):
+        """This object's hit/miss counts plus campaign-wide totals from disk."""
+        self.flush()
+        conn = self._connect()
+        totals = dict(conn.execute("SELECT name, value FROM stats").fetchall())
+        entries = conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "total_hits": totals["hits"],
+            "total_misses": totals["misses"],
+            "entries": entries,
+            "bytes": totals["bytes"],
+        }
+
+    def close(self):
+        if self._conn is not None and self._pid == os.getpid():
+            self.flush()
+            self._conn.close()
+        self._conn = None
+        self._pid = None
+
+
+def cached_solve(cache, fingerprint, solve_many, prices, budgets):
+    """
+    Answer budgets from the cache and send only the misses to solve_many.
+    solve_many(budgets) -> list of bundles
+    """
+    budgets = [float(b) for b in budgets]
+    if cache is None:
+        return solve_many(budgets)
+
+    bundles = cache.get_many(fingerprint, prices, budgets)
+    missing = [k for k, bundle in enumerate(bundles) if bundle is None]
+    if missing:
+        solved = solve_many([budgets[k] for k in missing])
+        for k, bundle in zip(missing, solved):
+            bundles[k] = bundle
+        cache.put_many(fingerprint, prices, [budgets[k] for k in missing], solved)
+    return bundles
@@ -1,7 +1,11 @@
+import os
 import numpy as np
 import gurobipy as gp
 from gurobipy import GRB
 from multiprocessing import Pool
+from interval_demand import IntervalDemandOracle
+from demand_cache import DemandCache, cached_solve
+from conflict_graph import ConflictGraph
 
 # ------------------------------------------------------------
 # Global objects inside each worker
@@ -13,100 +17,305 @@ _worker_n = None
 _worker_conflicts = None
 _worker_utilities = None
 
+# SharedDemandPool workers: agent id -> spec / lazily built solver
+_worker_agent_specs = None
+_worker_oracle = None
+_worker_solvers = {}
+
 
 # ------------------------------------------------------------
-# 1. INITIALIZER — runs ONCE per worker
+# 0. Persistent knapsack model (shared by both pool types)
 # ------------------------------------------------------------
-def demand_initializer(utilities, conflicts):
+def build_knapsack_model(utilities, conflicts):
     """
-    Build a persistent knapsack Gurobi model inside each worker.
+    Knapsack MIP with a placeholder budget row; prices and budget are
+    written into it by knapsack_solve.
+    conflicts: (j, k) pairs or a ConflictGraph; a graph built from spans
+               contributes one row per maximal clique instead of per pair
+    Returns (model, x, budget_constr).
     """
-    global _worker_model, _worker_x, _worker_budget_constr
-    global _worker_n, _worker_conflicts, _worker_utilities
-
-    _worker_utilities = np.array(utilities)
-    _worker_conflicts = conflicts
-    _worker_n = len(utilities)
+    utilities = np.array(utilities)
+    n = len(utilities)
 
     m = gp.Model()
     m.Params.OutputFlag = 0
 
-    x = m.addVars(_worker_n, vtype=GRB.BINARY, name="x")
+    x = m.addVars(n, vtype=GRB.BINARY, name="x")
 
     # Objective (fixed)
-    m.setObjective(gp.quicksum(_worker_utilities[j] * x[j] for j in range(_worker_n)),
+    m.setObjective(gp.quicksum(utilities[j] * x[j] for j in range(n)),
                    GRB.MAXIMIZE)
 
     # Budget constraint placeholder with price coefficients = 0 initially
     price_expr = gp.LinExpr(0.0)
-    for j in range(_worker_n):
+    for j in range(n):
         price_expr += 0.0 * x[j]
 
     budget_constr = m.addConstr(price_expr <= 0.0)
 
     # Add conflicts once
-    for (j, k) in conflicts:
-        m.addConstr(x[j] + x[k] <= 1)
+    if isinstance(conflicts, ConflictGraph):
+        for items in conflicts.constraint_sets():
+            m.addConstr(gp.quicksum(x[j] for j in items) <= 1)
+    else:
+        for (j, k) in conflicts:
+            m.addConstr(x[j] + x[k] <= 1)
+
+    m.update()
+    return m, x, budget_constr
+
+
+def knapsack_solve(m, x, budget_constr, n, prices, budget):
+    """Re-price the persistent model, solve, and return the 0/1 bundle."""
+    # Update price coefficients
+    for j in range(n):
+        m.chgCoeff(budget_constr, x[j], float(prices[j]))
+
+    # Update RHS
+    budget_constr.setAttr(GRB.Attr.RHS, float(budget))
 
     m.update()
+    m.optimize()
+
+    bundle = np.zeros(n, dtype=int)
+    for j in range(n):
+        bundle[j] = int(round(x[j].X))
 
-    _worker_model = m
-    _worker_x = x
-    _worker_budget_constr = budget_constr
+    return bundle
 
 
 # ------------------------------------------------------------
-# 2. DEMAND FUNCTION — reuses persistent model per call
+# 1. INITIALIZER — runs ONCE per worker
 # ------------------------------------------------------------
-def demand_solve(args):
+def demand_initializer(utilities, conflicts):
     """
-    Solve knapsack demand using persistent worker model.
-    args = (prices, budget)
+    Build a persistent knapsack Gurobi model inside each worker.
     """
     global _worker_model, _worker_x, _worker_budget_constr
-    global _worker_n
-
-    prices, budget = args
-
-    # Update price coefficients
-    for j in range(_worker_n):
-        _worker_model.chgCoeff(_worker_budget_constr, _worker_x[j], float(prices[j]))
+    global _worker_n, _worker_conflicts, _worker_utilities
 
-    # Update RHS
-    _worker_budget_constr.setAttr(GRB.Attr.RHS, float(budget))
+    _worker_utilities = np.array(utilities)
+    _worker_conflicts = conflicts
+    _worker_n = len(utilities)
 
-    _worker_model.update()
-    _worker_model.optimize()
+    _worker_model, _worker_x, _worker_budget_constr = \
+        build_knapsack_model(_worker_utilities, conflicts)
 
-    bundle = np.zeros(_worker_n, dtype=int)
-    for j in range(_worker_n):
-        bundle[j] = int(round(_worker_x[j].X))
 
-    return bundle
+# ------------------------------------------------------------
+# 2. DEMAND FUNCTION — reuses persistent model per call
+# ------------------------------------------------------------
+def demand_solve(args):
+    """
+    Solve knapsack demand using persistent worker model.
+    args = (prices, budget)
+    """
+    prices, budget = args
+    return knapsack_solve(_worker_model, _worker_x, _worker_budget_constr,
+                          _worker_n, prices, budget)
 
 
 # ------------------------------------------------------------
 # 3. DemandPool manager
 # ------------------------------------------------------------
 class DemandPool:
-    def __init__(self, utilities, conflicts, processes=4):
+    def __init__(self, utilities, conflicts, processes=4, oracle="mip", spans=None, cache=None):
+        """
+        oracle: "mip"      -> Gurobi knapsack in persistent worker processes
+                "interval" -> IntervalDemandOracle (needs spans); conflicts
+                              must be the overlapping pairs of spans
+        cache: optional DemandCache consulted before solving
+        conflicts may be a list of pairs or a ConflictGraph
+        """
         self.processes = processes
+        self.oracle = oracle
+        self.pool = None
+        self.interval_oracle = None
+        self.cache = cache
+        pairs = conflicts.pairs() if isinstance(conflicts, ConflictGraph) else conflicts
+        self.fingerprint = DemandCache.agent_fingerprint(utilities, pairs, oracle)
 
-        # Build worker processes, each with its own persistent model
-        self.pool = Pool(
-            processes=processes,
-            initializer=demand_initializer,
-            initargs=(utilities, conflicts)
-        )
+        if oracle == "interval":
+            if spans is None:
+                raise ValueError("interval oracle requires pairing spans")
+            # one frontier sweep answers all budgets; no workers needed
+            self.interval_oracle = IntervalDemandOracle(utilities, spans)
+        elif oracle == "mip":
+            # Build worker processes, each with its own persistent model
+            self.pool = Pool(
+                processes=processes,
+                initializer=demand_initializer,
+                initargs=(utilities, conflicts)
+            )
+        else:
+            raise ValueError(f"unknown demand oracle: {oracle}")
 
     def solve_many(self, prices, budgets):
         """
         prices: 1D price vector
         budgets: list or array of budgets
         """
+        return cached_solve(self.cache, self.fingerprint,
+                            lambda bs: self._solve_many(prices, bs), prices, budgets)
+
+    def _solve_many(self, prices, budgets):
+        if self.interval_oracle is not None:
+            return self.interval_oracle.solve_many(prices, budgets)
+
         args_list = [(prices, float(b)) for b in budgets]
         return self.pool.map(demand_solve, args_list)
 
     def close(self):
-        self.pool.close()
-        self.pool.join()
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+
+
+
+# ------------------------------------------------------------
+# 4. Shared pool — one set of workers for every agent
+# ------------------------------------------------------------
+def shared_demand_initializer(agent_specs, oracle):
+    """
+    agent_specs: dict agent_id -> (utilities, conflicts or ConflictGraph, spans)
+    Solvers are built lazily, the first time a worker sees an agent, and
+    then kept for the lifetime of the worker.
+    """
+    global _worker_agent_specs, _worker_oracle, _worker_solvers
+
+    _worker_agent_specs = agent_specs
+    _worker_oracle = oracle
+    _worker_solvers = {}
+
+
+def _worker_solver(agent_id):
+    if agent_id not in _worker_solvers:
+        utilities, conflicts, spans = _worker_agent_specs[agent_id]
+        if _worker_oracle == "interval":
+            _worker_solvers[agent_id] = IntervalDemandOracle(utilities, spans)
+        else:
+            _worker_solvers[agent_id] = build_knapsack_model(utilities, conflicts)
+    return _worker_solvers[agent_id]
+
+
+def shared_demand_solve(task):
+    """
+    task = (agent_id, prices, budgets)
+    Returns the demand bundles of that agent for each budget.
+    """
+    agent_id, prices, budgets = task
+    solver = _worker_solver(agent_id)
+
+    if _worker_oracle == "interval":
+        return solver.solve_many(prices, budgets)
+
+    m, x, budget_constr = solver
+    n = len(_worker_agent_specs[agent_id][0])
+    return [knapsack_solve(m, x, budget_constr, n, prices, b) for b in budgets]
+
+
+class SharedDemandPool:
+    """
+    One process pool serving demand queries for all agents of a market.
+
+    Workers keep a persistent solver per agent id, so the process count is
+    bounded by `processes` rather than growing with the number of crew.
+    The interval oracle answers a whole budget list with one sweep, so it
+    runs in-process and no workers are started.
+    """
+
+    def __init__(self, agents, processes=None, oracle="mip", cache=None):
+        """
+        agents: Crew objects (id, utilities, conflicts, spans are used)
+        processes: worker count, defaults to os.cpu_count()
+        oracle: "mip" or "interval"
+        cache: optional DemandCache consulted before dispatching to workers
+        """
+        if oracle not in ("mip", "interval"):
+            raise ValueError(f"unknown demand oracle: {oracle}")
+        if oracle == "interval" and any(a.spans is None for a in agents):
+            raise ValueError("interval oracle requires pairing spans")
+
+        self.processes = processes or os.cpu_count()
+        self.oracle = oracle
+        self.cache = cache
+        self.fingerprints = {
+            a.id: DemandCache.agent_fingerprint(a.utilities, a.conflicts, oracle)
+            for a in agents
+        }
+
+        self.pool = None
+        if oracle == "interval":
+            self.interval_oracles = {a.id: IntervalDemandOracle(a.utilities, a.spans)
+                                     for a in agents}
+            return
+
+        agent_specs = {a.id: (a.utilities, a.graph, a.spans) for a in agents}
+        self.pool = Pool(
+            processes=self.processes,
+            initializer=shared_demand_initializer,
+            initargs=(agent_specs, oracle)
+        )
+
+    def solve_batch(self, queries):
+        """
+        queries: list of (agent_id, prices, budgets)
+        Returns one list of bundles per query, in order.
+        """
+        if self.cache is None:
+            return self._solve_batch(queries)
+
+        # Answer what we can from the cache, then solve all misses in one batch
+        results, misses, owners = [], [], []
+        for q, (agent_id, prices, budgets) in enumerate(queries):
+            budgets = [float(b) for b in budgets]
+            bundles = self.cache.get_many(self.fingerprints[agent_id], prices, budgets)
+            missing = [k for k, bundle in enumerate(bundles) if bundle is None]
+            if missing:
+                misses.append((agent_id, prices, [budgets[k] for k in missing]))
+                owners.append((q, missing))
+            results.append(bundles)
+
+        for (q, missing), (agent_id, prices, budgets), solved in zip(
+                owners, misses, self._solve_batch(misses)):
+            for k, bundle in zip(missing, solved):
+                results[q][k] = bundle
+            self.cache.put_many(self.fingerprints[agent_id], prices, budgets, solved)
+
+        return results
+
+    def _solve_batch(self, queries):
+        if self.pool is None:
+            return [self.interval_oracles[agent_id].solve_many(prices, [float(b) for b in budgets])
+                    for agent_id, prices, budgets in queries]
+
+        # Split queries into chunks so all workers stay busy
+        total = sum(len(budgets) for _, _, budgets in queries)
+        chunk = max(1, -(-total // (4 * self.processes)))
+
+        tasks, owners = [], []
+        for q, (agent_id, prices, budgets) in enumerate(queries):
+            budgets = [float(b) for b in budgets]
+            for s in range(0, len(budgets), chunk):
+                tasks.append((agent_id, prices, budgets[s:s + chunk]))
+                owners.append(q)
+
+        results = [[] for _ in queries]
+        for q, bundles in zip(owners, self.pool.map(shared_demand_solve, tasks)):
+            results[q].extend(bundles)
+        return results
+
+    def solve_many(self, agent_id, prices, budgets):
+        """Single-agent convenience wrapper around solve_batch."""
+        return self.solve_batch([(agent_id, prices, budgets)])[0]
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,286 @@
+"""
+Monte Carlo fairness experiment for the serial dictatorship variants.
+
+    python experiment.py --scenarios 1000 --trials 100 --processes 8 --out results.pickle
+    python experiment.py --scenarios 10000 --store runs/fairness   # on disk, resumable
+
+For every scenario (a draw of crew preferences) the k-band and epsilon SD
+variants are run for NUM_TRIALS random orders each and compared with RSD.
+Scenario s always uses the s-th child of SeedSequence(seed), and results
+are folded into running means in scenario order, so the output does not
+depend on the number of worker processes.
+"""
+import sys
+import pickle
+import argparse
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+import sd as SD
+import metrics as M
+from preferences import line_features, preference_generator, rank, top_k
+from result_store import ResultStore
+
+
+K_VALUES = [1, 2, 3, 5, 7, 10, 15, 20, 25, 30, 35]
+EPS_VALUES = [0, 1, 2, 3, 5, 10, 15, 20, 25, 30, 50, 75, 100]
+
+
+class RunningStats:
+    """Welford running mean / variance of scalars or equal-shape arrays."""
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def update(self, x):
+        x = np.asarray(x, dtype=float)
+        self.n += 1
+        d = x - self.mean
+        self.mean = self.mean + d / self.n
+        self.m2 = self.m2 + d * (x - self.mean)
+
+    def var(self):
+        if self.n < 2:
+            return np.full(np.shape(self.mean), np.nan)
+        return self.m2 / (self.n - 1)
+
+    def se(self):
+        return np.sqrt(self.var() / self.n)
+
+
+# ------------------------------------------------------------
+# One scenario (runs in a worker)
+# ------------------------------------------------------------
+_worker_setup = None
+
+
+def _init_worker(setup):
+    global _worker_setup
+    _worker_setup = setup
+
+
+def sd_outcomes(P, U, orders, lines, truncated=False):
+    """
+    SD for each order row; returns per-trial crew utilities (trials, n_crew)
+    and assignments. Crew left unmatched get utility 0.
+    truncated: P holds top-k prefixes; exhausted crew fall back to U
+    """
+    A = SD.batched_serial_dictatorship(P, orders, lines, utility=U if truncated else None)
+    crew = np.arange(U.shape[0])
+    utils = np.where(A >= 0, U[crew, np.maximum(A, 0)], 0.0)
+    return utils, A
+
+
+def configs_of(n_crew, k_values, eps_values):
+    """(mechanism, parameter) pairs of a run; RSD is the k = n_crew baseline."""
+    return [("rsd", n_crew)] + [("k", k) for k in k_values] + [("eps", e) for e in eps_values]
+
+
+def simulate_scenario(seed_seq, setup=None):
+    """
+    setup: dict with F, lines, n_crew, n_trials, k_values, eps_values and
+           optionally top_k (preference prefixes of that length)
+    Returns config -> {"gini": Gini of mean crew utilities,
+                       "total": (n_trials,) total utility per trial,
+                       "envy": (n_trials, n_crew) justified envy by rank}
+    """
+    if setup is None:
+        setup = _worker_setup
+    F, lines = setup["F"], setup["lines"]
+    n, n_trials = setup["n_crew"], setup["n_trials"]
+    k_values, eps_values = setup["k_values"], setup["eps_values"]
+    seniority_order = np.arange(n)
+
+    configs = configs_of(n, k_values, eps_values)
+    seqs = seed_seq.spawn(1 + len(configs))
+
+    W = preference_generator(np.random.default_rng(seqs[0]), n, F.shape[0])
+    U = W @ F
+    truncated = bool(setup.get("top_k"))
+    P = top_k(U, setup["top_k"]) if truncated else rank(U)
+
+    out = {}
+    for (mechanism, value), seq in zip(configs, seqs[1:]):
+        rng = np.random.default_rng(seq)
+        if mechanism == "eps":
+            orders = SD.epsilon_shuffle_orders(seniority_order, value, n_trials, rng)
+        else:
+            orders = SD.banded_permutations(seniority_order, value, n_trials, rng)
+
+        utils, A = sd_outcomes(P, U, orders, lines, truncated)
+        out[(mechanism, value)] = {
+            "gini": M.gini(utils.mean(axis=0)),
+            "total": utils.sum(axis=1),
+            "envy": M.batched_justified_envy(seniority_order, U, A),
+        }
+    return out
+
+
+# ------------------------------------------------------------
+# Driver
+# ------------------------------------------------------------
+def _map_scenarios(setup, seeds, processes, chunksize):
+    """simulate_scenario over seeds, yielded in order."""
+    if processes == 1:
+        for seq in seeds:
+            yield simulate_scenario(seq, setup)
+    else:
+        with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker,
+                                 initargs=(setup,)) as ex:
+            yield from ex.map(simulate_scenario, seeds, chunksize=chunksize)
+
+
+def run_fairness_experiment(F, lines, k_values, eps_values, n_crew=35,
+                            n_scenarios=1000, n_trials=100, seed=12345,
+                            processes=None, chunksize=4, store=None, top_k=None):
+    """
+    Distribute scenarios over `processes` workers (1 = in-process) and
+    aggregate incrementally.
+
+    store: optional ResultStore directory. Per-trial rows are written there
+           as scenarios finish, scenarios already in the store are skipped
+           (resume), and the summary is computed from the store.
+    top_k: use top-k preference prefixes with utility fallback instead of
+           full rankings (same matchings, O(n * k) preference memory)
+
+    Returns the dict the sd_exp notebook plots from:
+    mean_gap_k / se_gap_k: Gini gap vs RSD per k (same for eps)
+    util_gap_k: (mean, se) of total utility minus mean RSD utility
+    envy_k / se_envy_k: per-rank mean justified envy and its SE
+    """
+    setup = {"F": F, "lines": lines, "n_crew": n_crew, "n_trials": n_trials,
+             "k_values": list(k_values), "eps_values": list(eps_values), "top_k": top_k}
+    configs = configs_of(n_crew, k_values, eps_values)
+    seeds = np.random.SeedSequence(seed).spawn(n_scenarios)
+
+    if store is not None:
+        store = ResultStore.create(store, configs, n_scenarios, {
+            "gini": ((), "float64"),
+            "total": ((n_trials,), "float64"),
+            "envy": ((n_trials, n_crew), "int16" if n_crew < 2**15 else "int32"),
+        }, attrs={"seed": seed, "n_crew": n_crew, "n_trials": n_trials})
+
+        pending = store.pending_scenarios()
+        results = _map_scenarios(setup, [seeds[s] for s in pending], processes, chunksize)
+        for s, out in zip(pending, results):
+            for config, values in out.items():
+                store.write(config, s, **values)
+        return fairness_results(store)
+
+    # in memory: running means of per-scenario summaries only
+    stats = {config: (RunningStats(), RunningStats(), RunningStats()) for config in configs}
+    rsd = configs[0]
+    for out in _map_scenarios(setup, seeds, processes, chunksize):
+        for config, values in out.items():
+            gap, total, envy = stats[config]
+            gap.update(values["gini"] - out[rsd]["gini"])
+            total.update(values["total"].mean())
+            envy.update(values["envy"].mean(axis=0))
+
+    results = {"n_scenarios": n_scenarios, "mean_rsd": float(stats[rsd][1].mean)}
+    for family in ("k", "eps"):
+        fam = {v: stats[(m, v)] for (m, v) in configs if m == family}
+        results[f"mean_gap_{family}"] = {v: float(s[0].mean) for v, s in fam.items()}
+        results[f"se_gap_{family}"] = {v: float(s[0].se()) for v, s in fam.items()}
+        results[f"util_gap_{family}"] = {
+            v: (float(s[1].mean - results["mean_rsd"]), float(s[1].se())) for v, s in fam.items()
+        }
+        results[f"envy_{family}"] = {v: s[2].mean for v, s in fam.items()}
+        results[f"se_envy_{family}"] = {v: s[2].se() for v, s in fam.items()}
+    return results
+
+
+def fairness_results(store):
+    """
+    The run_fairness_experiment summary from a ResultStore (path or
+    object), reading the memmapped arrays in scenario chunks. Works on
+    partially completed stores.
+    """
+    if not isinstance(store, ResultStore):
+        store = ResultStore(store, mode="r")
+    rsd = next(c for c in store.configs if c[0] == "rsd")
+    mean_rsd, _ = store.summary("total", rsd, reduce=(0,))
+
+    results = {"n_scenarios": len(store.completed_scenarios()), "mean_rsd": float(mean_rsd)}
+    for family in ("k", "eps"):
+        values = [v for (m, v) in store.configs if m == family]
+        gap = {v: store.summary("gini", (family, v), baseline=rsd) for v in values}
+        total = {v: store.summary("total", (family, v), reduce=(0,)) for v in values}
+        envy = {v: store.summary("envy", (family, v), reduce=(0,)) for v in values}
+
+        results[f"mean_gap_{family}"] = {v: float(gap[v][0]) for v in values}
+        results[f"se_gap_{family}"] = {v: float(gap[v][1]) for v in values}
+        results[f"util_gap_{family}"] = {
+            v: (float(total[v][0] - mean_rsd), float(total[v][1])) for v in values
+        }
+        results[f"envy_{family}"] = {v: envy[v][0] for v in values}
+        results[f"se_envy_{family}"] = {v: envy[v][1] for v in values}
+    return results
+
+
+def compute_disruption_curves(k_values, eps_values, seniority_order, trials=3000, seed=999):
+    """
+    Per-rank mean absolute and signed pick-position change for each k-band
+    size and epsilon, from `trials` bulk-generated orders per value.
+    """
+    rng = np.random.default_rng(seed)
+
+    disruption = {
+        "k_abs": {}, "k_signed": {},
+        "eps_abs": {}, "eps_signed": {}
+    }
+
+    for k in k_values:
+        orders = SD.banded_permutations(seniority_order, k, trials, rng)
+        disruption["k_abs"][k], disruption["k_signed"][k] = M.displacement_from_orders(orders)
+
+    for eps in eps_values:
+        orders = SD.epsilon_shuffle_orders(seniority_order, eps, trials, rng)
+        disruption["eps_abs"][eps], disruption["eps_signed"][eps] = M.displacement_from_orders(orders)
+
+    return disruption
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--lines", default="lines.pickle")
+    p.add_argument("--n-crew", type=int, default=35)
+    p.add_argument("--scenarios", type=int, default=1000)
+    p.add_argument("--trials", type=int, default=100)
+    p.add_argument("--k-values", nargs="+", type=int, default=K_VALUES)
+    p.add_argument("--eps-values", nargs="+", type=float, default=EPS_VALUES)
+    p.add_argument("--seed", type=int, default=12345)
+    p.add_argument("--processes", type=int, default=None, help="default: all cores")
+    p.add_argument("--chunksize", type=int, default=4)
+    p.add_argument("--out", default="fairness_results.pickle")
+    p.add_argument("--store", help="ResultStore directory for per-trial rows; rerun to resume")
+    p.add_argument("--top-k", type=int, help="truncate preference lists to k (utility fallback)")
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    with open(args.lines, "rb") as f:
+        lines = pickle.load(f)
+
+    results = run_fairness_experiment(
+        line_features(lines), lines, args.k_values, args.eps_values,
+        n_crew=args.n_crew, n_scenarios=args.scenarios, n_trials=args.trials,
+        seed=args.seed, processes=args.processes, chunksize=args.chunksize,
+        store=args.store, top_k=args.top_k,
+    )
+    with open(args.out, "wb") as f:
+        pickle.dump(results, f)
+
+    for family in ("k", "eps"):
+        for v in results[f"mean_gap_{family}"]:
+            print(f'{family}={v:<6} gini gap {results[f"mean_gap_{family}"][v]:+.4f} '
+                  f'(se {results[f"se_gap_{family}"][v]:.4f})  '
+                  f'utility gap {results[f"util_gap_{family}"][v][0]:+.4f}')
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
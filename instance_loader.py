@@ -0,0 +1,284 @@
+"""
+Loader for the GERAD crew scheduling instances (instance1 .. instance7).
+
+    inst = load_instance(3)                 # instances/instance3
+    start, end = inst.pairing_spans()       # epoch minutes
+    base2 = inst.pairings_at("BASE2")
+
+The first load parses the CSV / .in files into typed arrays and writes them
+as .npy files to a versioned cache directory next to the instance; later
+loads memory-map that cache, so they take milliseconds.
+"""
+import os
+import re
+import json
+import numpy as np
+
+FORMAT_VERSION = 1
+
+SOURCES = ("initialSolution.in", "listOfBases.csv", "crew_avail_const.csv",
+           "credit_constraints.csv", "credit_constrains.csv")
+
+PAIRING_RE = re.compile(r"Pairing\s+(\d+)\s*:\s*Base\s+(\w+)\s*:([^;]*);")
+LEG_RE = re.compile(r"(TDH_)?(LEG_\d+_\d+)")
+
+
+def instance_path(k, root=None):
+    """instance1 sits at the repository top level, the others under instances/."""
+    if root is None:
+        root = os.path.dirname(os.path.abspath(__file__))
+    if k == 1:
+        return os.path.join(root, "instance1")
+    return os.path.join(root, "instances", f"instance{k}")
+
+
+# ------------------------------------------------------------
+# Parsers
+# ------------------------------------------------------------
+def _csv_rows(path):
+    """Comma-split, whitespace-stripped rows, skipping blanks and quoted notes."""
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line or (line.startswith('"') and line.count(",") == 0):
+                continue
+            yield [field.strip() for field in line.split(",")]
+
+
+def _to_minutes(dates, hours):
+    """'2000-01-01', '12:00' -> int64 minutes since the Unix epoch."""
+    stamps = np.array([f"{d}T{h}" for d, h in zip(dates, hours)], dtype="datetime64[m]")
+    return stamps.astype(np.int64)
+
+
+def parse_legs(directory):
+    """All day_*.csv files -> leg names, airports and dep/arr epoch minutes."""
+    days = sorted((f for f in os.listdir(directory) if f.startswith("day_") and f.endswith(".csv")),
+                  key=lambda f: int(f[4:-4]))
+    rows = []
+    for name in days:
+        rows.extend(r for r in _csv_rows(os.path.join(directory, name)) if not r[0].startswith("#"))
+
+    names, dep_air, dep_date, dep_hour, arr_air, arr_date, arr_hour = map(list, zip(*rows))
+    return {
+        "names": names,
+        "dep_airport": dep_air,
+        "arr_airport": arr_air,
+        "dep": _to_minutes(dep_date, dep_hour),
+        "arr": _to_minutes(arr_date, arr_hour),
+    }
+
+
+def parse_pairings(path):
+    """initialSolution.in -> [(pairing id, base, [(leg name, deadhead), ...]), ...]"""
+    with open(path) as f:
+        text = f.read()
+
+    pairings = []
+    for pid, base, body in PAIRING_RE.findall(text):
+        legs = [(leg, bool(tdh)) for tdh, leg in LEG_RE.findall(body)]
+        pairings.append((int(pid), base, legs))
+    return pairings
+
+
+def parse_bases(path):
+    """listOfBases.csv -> airports, is-base flags, employee counts."""
+    rows = list(_csv_rows(path))[1:]
+    return ([r[0] for r in rows],
+            np.array([int(r[1]) for r in rows], dtype=bool),
+            np.array([int(r[2]) for r in rows], dtype=np.int32))
+
+
+def parse_crew_avail(path):
+    """crew_avail_const.csv -> base names, (n_days, n_bases) available crews."""
+    rows = list(_csv_rows(path))
+    header = next(r for r in rows if r[0] == "base")
+    days = [r for r in rows if r[0].startswith("Day")]
+    days.sort(key=lambda r: int(r[0][3:]))
+    return header[1:], np.array([[int(x) for x in r[1:]] for r in days], dtype=np.int32)
+
+
+def parse_credit(path):
+    """credit_constraints.csv -> base names, (n_bases,) credited hours."""
+    rows = list(_csv_rows(path))
+    i = next(a for a, r in enumerate(rows) if r[0] == "base")
+    return rows[i][1:], np.array([float(x) for x in rows[i + 1][1:]])
+
+
+# ------------------------------------------------------------
+# Instance
+# ------------------------------------------------------------
+class Instance:
+    """
+    One instance as flat arrays (all times in int64 epoch minutes).
+
+    legs      : leg_names (L,), leg_dep, leg_arr, leg_dep_airport,
+                leg_arr_airport (codes into airports)
+    airports  : airports (A,), is_base, employees
+    pairings  : pairing_ids (P,), pairing_base (airport code),
+                CSR pairing_indptr (P+1,) into pairing_legs / pairing_deadhead
+    bases     : base_names (B,) column order of crew_avail (days, B) and credit (B,)
+    missing_legs : legs named by a pairing but absent from the day files
+    """
+
+    ARRAYS = ("leg_names", "leg_dep", "leg_arr", "leg_dep_airport", "leg_arr_airport",
+              "airports", "is_base", "employees",
+              "pairing_ids", "pairing_base", "pairing_indptr", "pairing_legs", "pairing_deadhead",
+              "base_names", "crew_avail", "credit", "missing_legs")
+
+    def __init__(self, name, arrays):
+        self.name = name
+        for key in self.ARRAYS:
+            setattr(self, key, arrays[key])
+        self._airport_code = {a: c for c, a in enumerate(self.airports.tolist())}
+
+    @classmethod
+    def parse(cls, directory):
+        legs = parse_legs(directory)
+        airports, is_base, employees = parse_bases(os.path.join(directory, "listOfBases.csv"))
+        code = {a: c for c, a in enumerate(airports)}
+        for a in legs["dep_airport"] + legs["arr_airport"]:
+            if a not in code:
+                code[a] = len(airports)
+                airports.append(a)
+                is_base = np.append(is_base, False)
+                employees = np.append(employees, np.int32(0))
+
+        leg_index = {name: i for i, name in enumerate(legs["names"])}
+        pairings = parse_pairings(os.path.join(directory, "initialSolution.in"))
+
+        # a few pairings name legs absent from the day files (instance3:
+        # LEG_31_38); they are dropped from the pairing and listed instead
+        missing = sorted({leg for p in pairings for leg, _ in p[2] if leg not in leg_index})
+        pairings = [(pid, base, [l for l in p_legs if l[0] in leg_index])
+                    for pid, base, p_legs in pairings]
+        indptr = np.zeros(len(pairings) + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum([len(p[2]) for p in pairings])
+        flat = [leg for p in pairings for leg in p[2]]
+
+        base_names, crew_avail = parse_crew_avail(os.path.join(directory, "crew_avail_const.csv"))
+        credit_file = next(f for f in ("credit_constraints.csv", "credit_constrains.csv")
+                           if os.path.exists(os.path.join(directory, f)))
+        credit_bases, credit = parse_credit(os.path.join(directory, credit_file))
+        credit = credit[[credit_bases.index(b) for b in base_names]]
+
+        return cls(os.path.basename(os.path.normpath(directory)), {
+            "leg_names": np.array(legs["names"]),
+            "leg_dep": legs["dep"],
+            "leg_arr": legs["arr"],
+            "leg_dep_airport": np.array([code[a] for a in legs["dep_airport"]], dtype=np.int32),
+            "leg_arr_airport": np.array([code[a] for a in legs["arr_airport"]], dtype=np.int32),
+            "airports": np.array(airports),
+            "is_base": np.asarray(is_base, dtype=bool),
+            "employees": np.asarray(employees, dtype=np.int32),
+            "pairing_ids": np.array([p[0] for p in pairings], dtype=np.int32),
+            "pairing_base": np.array([code[p[1]] for p in pairings], dtype=np.int32),
+            "pairing_indptr": indptr,
+            "pairing_legs": np.array([leg_index[leg] for leg, _ in flat], dtype=np.int32),
+            "pairing_deadhead": np.array([dh for _, dh in flat], dtype=bool),
+            "base_names": np.array(base_names),
+            "crew_avail": crew_avail,
+            "credit": credit,
+            "missing_legs": np.array(missing, dtype=str),
+        })
+
+    # ------------------------------------------------------------
+    # Binary cache
+    # ------------------------------------------------------------
+    def save(self, cache_dir, signature):
+        os.makedirs(cache_dir, exist_ok=True)
+        for key in self.ARRAYS:
+            np.save(os.path.join(cache_dir, f"{key}.npy"), getattr(self, key))
+        # meta.json last: its presence marks a complete cache
+        tmp = os.path.join(cache_dir, "meta.json.tmp")
+        with open(tmp, "w") as f:
+            json.dump({"version": FORMAT_VERSION, "name": self.name, "sources": signature}, f)
+        os.replace(tmp, os.path.join(cache_dir, "meta.json"))
+
+    @classmethod
+    def load_cache(cls, cache_dir, signature):
+        """Memory-mapped Instance from cache_dir, or None if missing or stale."""
+        try:
+            with open(os.path.join(cache_dir, "meta.json")) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if meta.get("version") != FORMAT_VERSION or meta.get("sources") != signature:
+            return None
+        arrays = {key: np.load(os.path.join(cache_dir, f"{key}.npy"), mmap_mode="r")
+                  for key in cls.ARRAYS}
+        return cls(meta["name"], arrays)
+
+    # ------------------------------------------------------------
+    # Derived quantities
+    # ------------------------------------------------------------
+    @property
+    def n_pairings(self):
+        return len(self.pairing_ids)
+
+    def airport_code(self, airport):
+        return self._airport_code[airport]
+
+    def pairing_leg_slice(self, p):
+        return slice(self.pairing_indptr[p], self.pairing_indptr[p + 1])
+
+    def pairings_at(self, base):
+        """Indices of the pairings flown out of `base`."""
+        return np.flatnonzero(self.pairing_base == self.airport_code(base))
+
+    def pairing_spans(self):
+        """(start, end) epoch minutes of every pairing: first departure, last arrival."""
+        legs = self.pairing_legs
+        starts = self.pairing_indptr[:-1]
+        return (np.minimum.reduceat(self.leg_dep[legs], starts),
+                np.maximum.reduceat(self.leg_arr[legs], starts))
+
+    def pairing_flight_hours(self):
+        """Total leg duration of every pairing (deadheads included), in hours."""
+        durations = (self.leg_arr - self.leg_dep)[self.pairing_legs]
+        return np.add.reduceat(durations, self.pairing_indptr[:-1]) / 60.0
+
+    def pairing_n_legs(self):
+        return np.diff(self.pairing_indptr)
+
+    def pairing_overnights(self):
+        """Consecutive legs (by departure) where the next leg leaves on a later day."""
+        P = self.n_pairings
+        owner = np.repeat(np.arange(P), self.pairing_n_legs())
+        dep = self.leg_dep[self.pairing_legs]
+        arr = self.leg_arr[self.pairing_legs]
+
+        order = np.lexsort((dep, owner))
+        owner, dep, arr = owner[order], dep[order], arr[order]
+        same = owner[1:] == owner[:-1]
+        overnight = same & (dep[1:] // 1440 > arr[:-1] // 1440)
+        return np.bincount(owner[1:][overnight], minlength=P)
+
+
+def source_signature(directory):
+    """Sizes and mtimes of the raw files, to detect a stale cache."""
+    names = sorted(f for f in os.listdir(directory)
+                   if (f.startswith("day_") and f.endswith(".csv")) or f in SOURCES)
+    return {f: [os.path.getsize(os.path.join(directory, f)),
+                int(os.path.getmtime(os.path.join(directory, f)))] for f in names}
+
+
+def load_instance(instance, root=None, cache_dir=None, refresh=False):
+    """
+    instance: instance number (1..7) or a directory path
+    cache_dir: where the binary cache lives (default <instance>/.cache/v<FORMAT_VERSION>)
+    refresh: re-parse even if a valid cache exists
+    """
+    directory = instance_path(instance, root) if isinstance(instance, int) else instance
+    if cache_dir is None:
+        cache_dir = os.path.join(directory, ".cache", f"v{FORMAT_VERSION}")
+
+    signature = source_signature(directory)
+    if not refresh:
+        cached = Instance.load_cache(cache_dir, signature)
+        if cached is not None:
+            return cached
+
+    inst = Instance.parse(directory)
+    inst.save(cache_dir, signature)
+    return Instance.load_cache(cache_dir, signature)
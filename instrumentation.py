@@ -0,0 +1,184 @@
+import json
+import time
+import numpy as np
+from contextlib import contextmanager, nullcontext
+
+
+# ------------------------------------------------------------
+# Phase timers
+# ------------------------------------------------------------
+class PhaseTimer:
+    """
+    Accumulates wall-clock time per named phase, plus counters and Gurobi
+    solve statistics, until drain() hands them over and starts afresh.
+    """
+
+    enabled = True
+
+    def __init__(self):
+        self.times = {}
+        self.counters = {}
+        self.solves = []
+
+    @contextmanager
+    def phase(self, name):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.times[name] = self.times.get(name, 0.0) + time.perf_counter() - t0
+
+    def add_time(self, name, seconds):
+        self.times[name] = self.times.get(name, 0.0) + seconds
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def solve_stats(self, stats):
+        self.solves.extend(stats)
+
+    def drain(self):
+        out = {"phases": self.times, "counters": self.counters, "gurobi": self.solves}
+        self.times, self.counters, self.solves = {}, {}, []
+        return out
+
+
+class NullTimer:
+    """Stand-in used when no observer wants timings; every call is a no-op."""
+
+    enabled = False
+    _null = nullcontext()
+
+    def phase(self, name):
+        return self._null
+
+    def add_time(self, name, seconds):
+        pass
+
+    def count(self, name, n=1):
+        pass
+
+    def solve_stats(self, stats):
+        pass
+
+    def drain(self):
+        return {}
+
+
+# ------------------------------------------------------------
+# Observers
+# ------------------------------------------------------------
+class Observer:
+    """
+    Receives ACEEI.run events.
+
+    on_iteration gets one record per tatonnement iteration with the basic
+    fields iteration, error, best_error, prices, z, clipped, full_screen;
+    when timings are on (any observer with wants_timings) it also has
+    phases (seconds per phase), counters, regions_per_agent and gurobi
+    (one stats dict per optimize call). The "price_update" phase of a record
+    is the step that produced its prices, including any candidate
+    evaluations, whose own phases are counted as well.
+    on_run_end gets status ("converged", "stopped", "max_iter") and the
+    ACEEI.report() fields.
+    """
+
+    wants_timings = False
+
+    def on_run_start(self, aceei):
+        pass
+
+    def on_iteration(self, aceei, record):
+        pass
+
+    def on_run_end(self, aceei, record):
+        pass
+
+
+class ConsoleObserver(Observer):
+    """The progress printout ACEEI.run has always produced."""
+
+    def __init__(self, every=10):
+        self.every = every
+
+    def on_iteration(self, aceei, record):
+        if record["iteration"] % self.every == 0:
+            print(f'== Iteration {record["iteration"]} ==')
+            print(f'Prices: {record["prices"]}')
+            print(f'Excess Demand: {record["z"]}')
+            print(f'Clipped Excess Demand: {record["clipped"]}')
+            print(f'Clearing Error: {record["error"]}\n')
+
+    def on_run_end(self, aceei, record):
+        if record["status"] == "converged":
+            print(f'== A-CEEI FOUND at iter {record["iteration"]} ==')
+            print(f'Excess Demand: {record["z"]}')
+            print(f'Clipped Excess Demand: {record["clipped"]}')
+            print(f'Clearing Error: {record["error"]}')
+        elif record["status"] == "stopped":
+            print(f'Stopped early at iter {record["iteration"]}. Returning best solution found.\n')
+        else:
+            print("Reached max iterations. Returning best solution found.\n")
+
+
+def _to_json(value):
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"not JSON serializable: {type(value)}")
+
+
+class JSONLinesObserver(Observer):
+    """
+    Appends one JSON object per event to `path`:
+    {"event": "start" | "iteration" | "end", ...record}
+    """
+
+    wants_timings = True
+
+    def __init__(self, path, flush_every=1):
+        self.path = path
+        self.flush_every = flush_every
+        self._file = None
+        self._pending = 0
+
+    def _write(self, event, record):
+        if self._file is None:
+            self._file = open(self.path, "a")
+        self._file.write(json.dumps({"event": event, **record}, default=_to_json) + "\n")
+        self._pending += 1
+        if self._pending >= self.flush_every:
+            self._file.flush()
+            self._pending = 0
+
+    def on_run_start(self, aceei):
+        self._write("start", {
+            "n_agents": len(aceei.agents),
+            "n_items": len(aceei.capacities),
+            "oracle": aceei.oracle,
+            "search": aceei.search,
+            "strategy": aceei.price_strategy.name,
+            "delta": aceei.delta,
+            "epsilon": aceei.epsilon,
+        })
+
+    def on_iteration(self, aceei, record):
+        self._write("iteration", record)
+
+    def on_run_end(self, aceei, record):
+        self._write("end", record)
+        self.close()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._pending = 0
+
+
+def make_timer(observers):
+    """PhaseTimer if any observer wants timings, else the no-op NullTimer."""
+    if any(o.wants_timings for o in observers):
+        return PhaseTimer()
+    return NullTimer()
@@ -0,0 +1,129 @@
+import numpy as np
+from bisect import bisect_right
+
+
+def span_times(span):
+    """span: (start, end) tuple/list or dict with keys 'start', 'end'."""
+    if isinstance(span, tuple) or isinstance(span, list):
+        return span[0], span[1]
+    return span["start"], span["end"]
+
+
+def _span_key(t):
+    # pandas Timestamps / datetimes compare fine, but numbers are cheaper
+    if hasattr(t, "value"):
+        return t.value
+    if hasattr(t, "timestamp"):
+        return t.timestamp()
+    return t
+
+
+class IntervalDemandOracle:
+    """
+    Exact demand oracle for an agent whose item conflicts are time overlaps.
+
+    Solves   max  sum_j u_j x_j
+             s.t. sum_j p_j x_j <= budget
+                  {j : x_j = 1} pairwise non-overlapping
+
+    i.e. the same problem as the knapsack MIP in demand_pool.demand_solve when
+    the conflicts are exactly the overlapping pairs of `spans`. Items are
+    swept in end-time order; for every prefix we keep the Pareto frontier of
+    (cost, utility) over conflict-free subsets, so the weighted-interval
+    recursion F[i] = F[i-1] U (F[p(i)] + item i) stays exact for real prices.
+    """
+
+    def __init__(self, utilities, spans, tol=1e-9):
+        """
+        utilities[j]: utility of item j
+        spans: dict or list, spans[j] = (start_j, end_j) of item j
+        tol: budget feasibility tolerance
+        """
+        self.utilities = np.array(utilities, dtype=float)
+        self.n_items = len(self.utilities)
+        self.tol = tol
+
+        starts = np.empty(self.n_items)
+        ends = np.empty(self.n_items)
+        for j in range(self.n_items):
+            s, e = span_times(spans[j])
+            starts[j] = _span_key(s)
+            ends[j] = _span_key(e)
+
+        # Items that can never raise utility are left out of every bundle
+        useful = np.flatnonzero(self.utilities > 0)
+        order = useful[np.lexsort((starts[useful], ends[useful]))]
+        sorted_ends = list(ends[order])
+
+        self.order = order
+        # pred[i] = number of (end-sorted) items that finish before item i starts
+        self.pred = [min(bisect_right(sorted_ends, starts[j]), i)
+                     for i, j in enumerate(order)]
+
+    def frontier(self, prices, budget):
+        """
+        Pareto frontier of conflict-free bundles with cost <= budget.
+
+        Returns a list of (cost, utility, mask) sorted by increasing cost and
+        strictly increasing utility; mask is an int bitset over item indices.
+        """
+        prices = np.asarray(prices, dtype=float)
+        cap = float(budget) + self.tol
+
+        F = [[(0.0, 0.0, 0)]]
+        for i, j in enumerate(self.order):
+            c_j = float(prices[j])
+            u_j = float(self.utilities[j])
+            bit = 1 << int(j)
+
+            take = [(c + c_j, u + u_j, mask | bit)
+                    for (c, u, mask) in F[self.pred[i]]
+                    if c + c_j <= cap]
+            F.append(_pareto(F[-1], take))
+
+        return F[-1]
+
+    def solve(self, prices, budget):
+        """Demand bundle (0/1 array) at a single budget."""
+        return self.solve_many(prices, [budget])[0]
+
+    def solve_many(self, prices, budgets):
+        """
+        Demand bundles for several budgets at one price vector.
+        One frontier sweep at max(budgets) answers every budget.
+        """
+        budgets = [float(b) for b in budgets]
+        if len(budgets) == 0:
+            return []
+
+        front = self.frontier(prices, max(budgets))
+        costs = [c for c, _, _ in front]
+
+        bundles = []
+        for b in budgets:
+            # last frontier point that is affordable = max utility
+            k = bisect_right(costs, b + self.tol) - 1
+            bundles.append(self._unpack(front[max(k, 0)][2]))
+        return bundles
+
+    def _unpack(self, mask):
+        bundle = np.zeros(self.n_items, dtype=int)
+        j = 0
+        while mask:
+            if mask & 1:
+                bundle[j] = 1
+            mask >>= 1
+            j += 1
+        return bundle
+
+
+def _pareto(skip, take):
+    """Merge two cost-sorted frontiers, keeping only non-dominated points."""
+    merged = sorted(skip + take, key=lambda e: (e[0], -e[1]))
+    front = []
+    best = -np.inf
+    for entry in merged:
+        if entry[1] > best + 1e-12:
+            front.append(entry)
+            best = entry[1]
+    return front
@@ -0,0 +1,353 @@
+"""
+Monthly lines from pairings: triples of non-overlapping pairings, balanced
+by pairing weight (the lines.ipynb triple packing, scaled up).
+
+    table = pairing_table_from_instance(load_instance(1), "BASE2")
+    packing = build_lines(table, restarts=200, processes=8, seed=1234)
+    lines = lines_dict(table, packing["index"])       # lines.pickle format
+    print(packing["coverage"])
+
+Pairings are sorted by weight and dealt into three buckets as in the
+notebook. Candidate triples (one pairing per bucket, no two overlapping)
+are generated with numpy over blocks of bucket-1 pairings, scored with the
+notebook's balance / end-time score, and packed greedily into disjoint
+triples. Restart 0 is the deterministic candidate greedy; later restarts
+jitter the bucketing weights and the scores, and the packing covering the
+most pairings wins.
+
+    python line_builder.py --instance 1 --base BASE2 --restarts 200 --out lines.pickle
+"""
+import sys
+import pickle
+import argparse
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+from interval_demand import span_times
+from instance_loader import load_instance
+
+
+# ------------------------------------------------------------
+# Pairing tables
+# ------------------------------------------------------------
+def pairing_table(pairing_dict, spans=None):
+    """
+    pairing_dict: {pairing id: {"legs", "length", "flight_time", "overnights",
+                   "start", "end"}} as in pairings.pickle
+    spans: optional {pairing id: (start, end)} overriding start / end
+    Returns a dict of per-pairing arrays; start / end in minutes.
+    """
+    ids = list(pairing_dict)
+    start = np.empty(len(ids))
+    end = np.empty(len(ids))
+    for a, p in enumerate(ids):
+        s, e = span_times(spans[p] if spans is not None else pairing_dict[p])
+        start[a], end[a] = _minutes(s), _minutes(e)
+
+    return {
+        "ids": np.array(ids),
+        "start": start,
+        "end": end,
+        "length": np.array([pairing_dict[p]["length"] for p in ids], dtype=float),
+        "flight_time": np.array([pairing_dict[p]["flight_time"] for p in ids], dtype=float),
+        "overnights": np.array([pairing_dict[p]["overnights"] for p in ids], dtype=int),
+        "legs": [[leg.replace("TDH_", "") for leg in pairing_dict[p]["legs"]] for p in ids],
+    }
+
+
+def _minutes(t):
+    """Timestamp / datetime -> epoch minutes; numbers are taken as minutes."""
+    if hasattr(t, "value"):
+        return t.value / 6e10
+    if hasattr(t, "timestamp"):
+        return t.timestamp() / 60.0
+    return float(t)
+
+
+def pairing_table_from_instance(inst, base):
+    """The pairing_table of one base of an instance_loader.Instance."""
+    rows = inst.pairings_at(base)
+    start, end = inst.pairing_spans()
+    return {
+        "ids": np.asarray(inst.pairing_ids)[rows],
+        "start": start[rows].astype(float),
+        "end": end[rows].astype(float),
+        "length": inst.pairing_n_legs()[rows].astype(float),
+        "flight_time": inst.pairing_flight_hours()[rows],
+        "overnights": inst.pairing_overnights()[rows],
+        "legs": [inst.leg_names[inst.pairing_legs[inst.pairing_leg_slice(p)]].tolist() for p in rows],
+    }
+
+
+# ------------------------------------------------------------
+# Weights, buckets, candidates
+# ------------------------------------------------------------
+def compute_weights(length, flight_time, alpha=1, beta=1):
+    """alpha * z(length) + beta * z(flight time), as in lines.ipynb."""
+    L = (length - length.mean()) / (length.std() + 1e-6)
+    F = (flight_time - flight_time.mean()) / (flight_time.std() + 1e-6)
+    return alpha * L + beta * F
+
+
+def make_buckets(weights):
+    """Deal pairings by descending weight into 3 buckets; bucket 3 reversed."""
+    order = np.argsort(-weights, kind="stable")
+    return order[0::3], order[1::3], order[2::3][::-1]
+
+
+def _disjoint(start, end, a, b):
+    """(len(a), len(b)) True where pairings a[i] and b[j] do not overlap."""
+    return (end[a][:, None] <= start[b][None, :]) | (end[b][None, :] <= start[a][:, None])
+
+
+def candidate_triples(start, end, weights, buckets, max_per_pairing=256, max_elements=2**22,
+                      bonus=None):
+    """
+    Non-overlapping (b1, b2, b3) triples, scored as in lines.ipynb:
+        -(|w1 - w2| + |w1 - w3| + |w2 - w3|) - 1e-6 * end spread (seconds)
+    plus bonus[p1] + bonus[p2] + bonus[p3] if given. Bucket-1 pairings are
+    processed in blocks of at most max_elements (b1 x b2 x b3) cells and
+    each keeps its max_per_pairing best triples.
+
+    Returns (triples (T, 3) pairing indices, scores (T,), cutoff (len(b1),)):
+    cutoff is the lowest kept score of a bucket-1 pairing whose list was
+    truncated (its other triples score no higher), -inf otherwise.
+    """
+    b1, b2, b3 = buckets
+    cutoff = np.full(len(b1), -np.inf)
+    if not (len(b1) and len(b2) and len(b3)):
+        return np.empty((0, 3), dtype=np.int64), np.empty(0), cutoff
+
+    ok23 = _disjoint(start, end, b2, b3)
+    w2, w3 = weights[b2][:, None], weights[b3][None, :]
+    e2, e3 = end[b2][:, None], end[b3][None, :]
+    base23 = -np.abs(w2 - w3)
+    if bonus is not None:
+        base23 = base23 + bonus[b2][:, None] + bonus[b3][None, :]
+
+    block = max(1, max_elements // (len(b2) * len(b3)))
+    triples, scores = [], []
+    for lo in range(0, len(b1), block):
+        p1 = b1[lo:lo + block]
+        ok = _disjoint(start, end, p1, b2)[:, :, None] & _disjoint(start, end, p1, b3)[:, None, :] & ok23
+
+        w1 = weights[p1][:, None, None]
+        e1 = end[p1][:, None, None]
+        e_min = np.minimum(np.minimum(e1, e2), e3)
+        spread = (e1 + e2 + e3 - 3 * e_min) * 60.0
+        score = base23 - (np.abs(w1 - w2) + np.abs(w1 - w3)) - 1e-6 * spread
+        if bonus is not None:
+            score = score + bonus[p1][:, None, None]
+        score = np.where(ok, score, -np.inf).reshape(len(p1), -1)
+
+        k = min(max_per_pairing, score.shape[1])
+        top = np.argpartition(-score, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(score, top, axis=1)
+        if k < score.shape[1]:
+            n_valid = ok.reshape(len(p1), -1).sum(axis=1)
+            truncated = n_valid > k
+            cutoff[lo:lo + block][truncated] = top_scores[truncated].min(axis=1)
+
+        rows, cols = np.nonzero(np.isfinite(top_scores))
+        flat = top[rows, cols]
+        triples.append(np.stack([p1[rows], b2[flat // len(b3)], b3[flat % len(b3)]], axis=1))
+        scores.append(top_scores[rows, cols])
+
+    return np.concatenate(triples), np.concatenate(scores), cutoff
+
+
+def greedy_pack(start, end, weights, buckets, max_per_pairing=256, bonus=None):
+    """
+    Best-score-first selection of pairwise disjoint triples, as the
+    notebook's candidate greedy, without materializing every triple.
+
+    Candidates are generated in rounds over the still unused pairings. A
+    round walks its candidates by descending score and stops as soon as
+    some unused, truncated bucket-1 pairing could have an unlisted triple
+    scoring higher than the current one; the next round regenerates.
+    Returns (triples (L, 3) pairing indices, scores (L,)).
+    """
+    used = np.zeros(len(weights), dtype=bool)
+    chosen, chosen_scores = [], []
+    while True:
+        live = [b[~used[b]] for b in buckets]
+        triples, scores, cutoff = candidate_triples(start, end, weights, live,
+                                                    max_per_pairing, bonus=bonus)
+        if not len(triples):
+            break
+
+        # truncated bucket-1 pairings by descending cutoff
+        bound = np.flatnonzero(np.isfinite(cutoff))
+        bound = live[0][bound[np.argsort(-cutoff[bound], kind="stable")]]
+        bound_score = np.sort(cutoff[np.isfinite(cutoff)])[::-1]
+        b = 0
+
+        for t in np.argsort(-scores, kind="stable"):
+            while b < len(bound) and used[bound[b]]:
+                b += 1
+            if b < len(bound) and scores[t] < bound_score[b]:
+                break
+            p = triples[t]
+            if used[p[0]] or used[p[1]] or used[p[2]]:
+                continue
+            used[p] = True
+            chosen.append(p)
+            chosen_scores.append(scores[t])
+
+    if not chosen:
+        return np.empty((0, 3), dtype=np.int64), np.empty(0)
+    return np.array(chosen), np.array(chosen_scores)
+
+
+# ------------------------------------------------------------
+# Restarts
+# ------------------------------------------------------------
+def pack_once(table, seed_seq=None, alpha=1, beta=1, jitter=0.25, noise=1e-3,
+              max_per_pairing=256):
+    """
+    One packing. seed_seq None is the deterministic candidate greedy;
+    otherwise bucketing weights get N(0, jitter) noise and every pairing a
+    U(0, noise / 3) score bonus, in the spirit of the notebook's randomized
+    variant.
+    Returns (triples (L, 3) pairing indices ordered by start, total score).
+    """
+    start, end = table["start"], table["end"]
+    weights = compute_weights(table["length"], table["flight_time"], alpha, beta)
+
+    bonus = None
+    if seed_seq is None:
+        buckets = make_buckets(weights)
+    else:
+        rng = np.random.default_rng(seed_seq)
+        buckets = make_buckets(weights + rng.normal(0, jitter, len(weights)))
+        bonus = rng.random(len(weights)) * noise / 3
+
+    picked, scores = greedy_pack(start, end, weights, buckets, max_per_pairing, bonus)
+    picked = np.take_along_axis(picked, np.argsort(start[picked], axis=1, kind="stable"), axis=1)
+    if bonus is not None:
+        scores = scores - bonus[picked].sum(axis=1)
+    return picked, float(scores.sum())
+
+
+_worker_table = None
+
+
+def _init_worker(table, options):
+    global _worker_table
+    _worker_table = (table, options)
+
+
+def _pack_restart(seed_seq):
+    table, options = _worker_table
+    return pack_once(table, seed_seq, **options)
+
+
+def build_lines(table, restarts=1, processes=1, seed=None, alpha=1, beta=1,
+                jitter=0.25, noise=1e-3, max_per_pairing=256):
+    """
+    Best packing over `restarts` runs: restart 0 deterministic, restart r > 0
+    seeded by the r-th child of SeedSequence(seed), so the result does not
+    depend on `processes`. Best = most triples, then highest total score,
+    then lowest restart index.
+
+    Returns {"triples": [(pairing id, ...), ...], "index": (L, 3) indices
+    into table, "score", "restart", "coverage": coverage_stats(...)}.
+    """
+    options = {"alpha": alpha, "beta": beta, "jitter": jitter, "noise": noise,
+               "max_per_pairing": max_per_pairing}
+    seeds = [None] + np.random.SeedSequence(seed).spawn(max(0, restarts - 1))
+
+    if processes == 1:
+        results = (pack_once(table, s, **options) for s in seeds)
+        best = _best(results)
+    else:
+        with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker,
+                                 initargs=(table, options)) as ex:
+            best = _best(ex.map(_pack_restart, seeds, chunksize=max(1, len(seeds) // (4 * processes))))
+
+    restart, (index, score) = best
+    return {
+        "triples": [tuple(table["ids"][t].tolist()) for t in index],
+        "index": index,
+        "score": score,
+        "restart": restart,
+        "coverage": coverage_stats(table, index, alpha, beta),
+    }
+
+
+def _best(results):
+    best = None
+    for r, (index, score) in enumerate(results):
+        if best is None or (len(index), score) > (len(best[1][0]), best[1][1]):
+            best = (r, (index, score))
+    return best
+
+
+# ------------------------------------------------------------
+# Output
+# ------------------------------------------------------------
+def coverage_stats(table, index, alpha=1, beta=1):
+    """How much of the pairing set a packing uses, and how balanced it is."""
+    n = len(table["ids"])
+    used = np.zeros(n, dtype=bool)
+    used[np.asarray(index, dtype=np.int64).ravel()] = True
+    weights = compute_weights(table["length"], table["flight_time"], alpha, beta)
+    line_weight = weights[index].sum(axis=1) if len(index) else np.empty(0)
+    flight = table["flight_time"]
+
+    return {
+        "n_pairings": n,
+        "n_lines": len(index),
+        "max_lines": n // 3,
+        "pairings_used": int(used.sum()),
+        "coverage": float(used.mean()) if n else 0.0,
+        "flight_time_coverage": float(flight[used].sum() / flight.sum()) if n else 0.0,
+        "line_weight_std": float(line_weight.std()) if len(line_weight) else 0.0,
+        "unused": table["ids"][~used].tolist(),
+    }
+
+
+def lines_dict(table, index):
+    """{line: {"legs", "num_legs", "overnights", "flight_time"}} as in lines.pickle."""
+    lines = {}
+    for line, triple in enumerate(np.asarray(index)):
+        legs = [leg for p in triple for leg in table["legs"][p]]
+        lines[line] = {
+            "legs": legs,
+            "num_legs": len(legs),
+            "overnights": int(table["overnights"][triple].sum()),
+            "flight_time": table["flight_time"][triple].sum(),
+        }
+    return lines
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--instance", type=int, default=1)
+    p.add_argument("--base", default="BASE2")
+    p.add_argument("--restarts", type=int, default=200)
+    p.add_argument("--processes", type=int, default=1)
+    p.add_argument("--seed", type=int, default=1234)
+    p.add_argument("--alpha", type=float, default=1)
+    p.add_argument("--beta", type=float, default=1)
+    p.add_argument("--out", default="lines.pickle")
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    table = pairing_table_from_instance(load_instance(args.instance), args.base)
+    packing = build_lines(table, restarts=args.restarts, processes=args.processes,
+                          seed=args.seed, alpha=args.alpha, beta=args.beta)
+    with open(args.out, "wb") as f:
+        pickle.dump(lines_dict(table, packing["index"]), f)
+
+    c = packing["coverage"]
+    print(f'{c["n_lines"]} lines ({c["max_lines"]} possible), '
+          f'{c["pairings_used"]}/{c["n_pairings"]} pairings used, '
+          f'flight time coverage {c["flight_time_coverage"]:.3f}, best restart {packing["restart"]}')
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
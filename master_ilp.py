@@ -0,0 +1,190 @@
+import time
+import numpy as np
+import gurobipy as gp
+from gurobipy import GRB
+
+
+class MasterILP:
+    """
+    Persistent A-CEEI budget-perturbation ILP, updated in place between
+    tatonnement iterations.
+
+        min  sum_j z+_j + z-_j                         (clearing error)
+        then min sum_{i,l} x_il * end_il  s.t. error = z*   (min budgets)
+
+        sum_l x_il = 1                                 one region per agent
+        sum_{i,l} x_il * bundle_il[j] (= or <=) c_j + z_j   (= when p_j > 0)
+        x_il + x_jl' <= 1                              EF-TB pairs
+
+    Only agents whose subregions changed get their columns replaced; EF-TB
+    rows are diffed against the previous set and clearing senses are flipped
+    when a price crosses zero. The last incumbent is passed as a MIP start.
+    """
+
+    def __init__(self, capacities):
+        self.capacities = np.asarray(capacities, dtype=float)
+        n_items = len(self.capacities)
+
+        m = gp.Model("ACEEI_Budget_Perturbation")
+        m.Params.OutputFlag = 0
+        m.ModelSense = GRB.MINIMIZE
+
+        # clearing variables with pos/neg splits for abs values
+        self.z = m.addVars(n_items, lb=-GRB.INFINITY, name="z")
+        self.z_pos = m.addVars(n_items, name="z+")
+        self.z_neg = m.addVars(n_items, name="z-")
+        for j in range(n_items):
+            m.addConstr(self.z[j] == self.z_pos[j] - self.z_neg[j])
+
+        # market clearing rows; region columns are added into them later
+        self.equality = np.zeros(n_items, dtype=bool)
+        self.clearing = [
+            m.addLConstr(gp.LinExpr(-1.0, self.z[j]), GRB.LESS_EQUAL, self.capacities[j])
+            for j in range(n_items)
+        ]
+
+        # cap on the clearing error, tightened to z* for the second solve
+        self.error_expr = gp.quicksum(self.z_pos[j] + self.z_neg[j] for j in range(n_items))
+        self.error_cap = m.addLConstr(self.error_expr, GRB.LESS_EQUAL, GRB.INFINITY)
+
+        self.model = m
+        self.regions = {}        # agent id -> [(bundle key, start, end), ...]
+        self.signatures = {}     # agent id -> RegionStore.signature of those regions
+        self.x = {}              # (i, l) -> region variable
+        self.one_region = {}     # agent id -> sum_l x_il = 1 row
+        self.eftb = {}           # (i, li, j, lj) -> EF-TB row
+        self.incumbent = {}      # agent id -> (bundle key, end) chosen last solve
+        self.solve_stats = []    # one dict per optimize() call of the last solve
+
+    # ------------------------------------------------------------
+    # In-place updates
+    # ------------------------------------------------------------
+    def update(self, store, constrained_pairs, prices):
+        """
+        store: RegionStore with every agent's subregions
+        constrained_pairs: set of (i, li, j, lj) EF-TB pairs
+        prices: current price vector (sets the clearing senses)
+        """
+        m = self.model
+        B = store.bundle_matrix()
+
+        # -------------------------------------------------------
+        # a. Region columns for agents whose subregions changed
+        # -------------------------------------------------------
+        changed = set()
+        for i in store.agent_ids:
+            signature = store.signature(i)
+            if self.signatures.get(i) == signature:
+                continue
+            changed.add(i)
+
+            old = [self.x.pop((i, l)) for l in range(len(self.regions.get(i, [])))]
+            if old:
+                m.remove(old)
+            if i not in self.one_region:
+                self.one_region[i] = m.addLConstr(gp.LinExpr(), GRB.EQUAL, 1.0)
+
+            keys = []
+            for l, r in enumerate(store.rows(i)):
+                items = np.flatnonzero(B[r])
+                col = gp.Column([1.0] * (len(items) + 1),
+                                [self.one_region[i]] + [self.clearing[j] for j in items])
+                self.x[(i, l)] = m.addVar(vtype=GRB.BINARY, column=col, name=f"x_{i}_{l}")
+                keys.append((store.key(r), store.starts[r], store.ends[r]))
+
+            self.regions[i] = keys
+            self.signatures[i] = signature
+
+        # -------------------------------------------------------
+        # b. EF-TB rows as a diff against the current set
+        # -------------------------------------------------------
+        stale = [key for key in self.eftb
+                 if key not in constrained_pairs or key[0] in changed or key[2] in changed]
+        if stale:
+            m.remove([self.eftb.pop(key) for key in stale])
+
+        for key in constrained_pairs:
+            if key not in self.eftb:
+                i, li, j, lj = key
+                self.eftb[key] = m.addLConstr(self.x[(i, li)] + self.x[(j, lj)],
+                                              GRB.LESS_EQUAL, 1.0)
+
+        # -------------------------------------------------------
+        # c. Clearing senses: equality iff p_j > 0
+        # -------------------------------------------------------
+        equality = np.asarray(prices) > 0
+        for j in np.flatnonzero(equality != self.equality):
+            self.clearing[j].Sense = GRB.EQUAL if equality[j] else GRB.LESS_EQUAL
+        self.equality = equality
+
+        m.update()
+
+        # -------------------------------------------------------
+        # d. Warm start from the previous incumbent
+        # -------------------------------------------------------
+        for i, keys in self.regions.items():
+            prev = self.incumbent.get(i)
+            for l, (key, start, end) in enumerate(keys):
+                self.x[(i, l)].Start = 1.0 if prev == (key, end) else 0.0
+
+    # ------------------------------------------------------------
+    # Lexicographic solve
+    # ------------------------------------------------------------
+    def solve(self):
+        """
+        Returns (z_sol, chosen) where z_sol is the excess demand of the
+        min-error solve and chosen[i] is the region index picked for agent i
+        by the min-budget re-solve.
+        """
+        m = self.model
+        x_vars = list(self.x.values())
+        z_split = list(self.z_pos.values()) + list(self.z_neg.values())
+
+        self.solve_stats = []
+
+        # 1. minimize clearing error
+        self.error_cap.RHS = GRB.INFINITY
+        m.setAttr("Obj", x_vars, [0.0] * len(x_vars))
+        m.setAttr("Obj", z_split, [1.0] * len(z_split))
+        self._optimize("error")
+
+        z_sol = np.array([self.z[j].X for j in range(len(self.capacities))])
+        z_star = m.ObjVal
+
+        # start the second solve from the first one's solution
+        for var in x_vars:
+            var.Start = var.X
+
+        # 2. re-solve with minimum norm budget at that error
+        self.error_cap.RHS = z_star
+        m.setAttr("Obj", z_split, [0.0] * len(z_split))
+        m.setAttr("Obj", x_vars, [self.regions[i][l][2] for (i, l) in self.x])   # region_end = chosen budget
+        self._optimize("budget")
+
+        chosen = {}
+        for (i, l), var in self.x.items():
+            if var.X > 0.5:     # chosen subregion
+                chosen[i] = l
+                key, start, end = self.regions[i][l]
+                self.incumbent[i] = (key, end)
+
+        return z_sol, chosen
+
+    def _optimize(self, phase):
+        m = self.model
+        t0 = time.perf_counter()
+        m.optimize()
+        self.solve_stats.append({
+            "phase": phase,
+            "wall": time.perf_counter() - t0,
+            "runtime": m.Runtime,
+            "status": m.Status,
+            "nodes": m.NodeCount,
+            "simplex_iters": m.IterCount,
+            "gap": m.MIPGap if m.SolCount > 0 else None,
+            "vars": m.NumVars,
+            "constrs": m.NumConstrs,
+        })
+
+    def dispose(self):
+        self.model.dispose()
@@ -1,28 +1,35 @@
 import numpy as np
 
-def displacement_metrics(order_generator, seniority_order, trials, rng):
+def displacement_from_orders(orders):
     """
-    Computes both absolute and signed displacement for each seniority rank.
-    Returns: abs_dev, signed_dev
+    orders: (trials, n) pick orders over crew 0..n-1 (crew id = seniority rank)
+    Returns per-rank mean absolute and signed displacement: abs_dev, signed_dev
     """
+    orders = np.atleast_2d(np.asarray(orders, dtype=int))
+    trials, n = orders.shape
 
-    n = len(seniority_order)
-    abs_dev = np.zeros(n)
-    signed_dev = np.zeros(n)
+    # pos[t, crew] = position where that crew picks (inverse permutations)
+    pos = np.empty_like(orders)
+    np.put_along_axis(pos, orders, np.broadcast_to(np.arange(n), orders.shape), axis=1)
 
-    for _ in range(trials):
-        order = np.array(order_generator(rng), dtype=int)
+    diff = pos - np.arange(n)  # signed displacement
+    return np.abs(diff).mean(axis=0), diff.mean(axis=0)
 
-        # pos[crew] = position where that crew picks
-        pos = np.empty(n, dtype=int)
-        for pick_pos, crew in enumerate(order):
-            pos[crew] = pick_pos
 
-        diff = pos - np.arange(n)  # signed displacement
-        abs_dev   += np.abs(diff)
-        signed_dev += diff
+def displacement_metrics(order_generator, seniority_order, trials, rng, batched=False):
+    """
+    Computes both absolute and signed displacement for each seniority rank.
 
-    return abs_dev / trials, signed_dev / trials
+    order_generator(rng) returns one order; with batched=True,
+    order_generator(rng, trials) returns all (trials, n) orders at once
+    (e.g. sd.banded_permutations).
+    Returns: abs_dev, signed_dev
+    """
+    if batched:
+        orders = order_generator(rng, trials)
+    else:
+        orders = np.array([order_generator(rng) for _ in range(trials)], dtype=int)
+    return displacement_from_orders(orders)
 
 def total_utility(matching, utilities):
     """
@@ -59,29 +66,87 @@ def gini(values):
     """
     Compute Gini coefficient of a 1D numpy array.
     Works for utilities or ranks (although Gini on ranks is especially meaningful).
+
+    Sort-based, O(n log n) time and O(n) memory:
+        G = sum_i (2i - n - 1) x_(i) / (n * sum x),   x_(1) <= ... <= x_(n)
+    which equals sum_{i,j} |x_i - x_j| / (2 n^2 mean).
     """
-    x = np.array(values).flatten()
+    x = np.sort(np.asarray(values, dtype=float).ravel())
     n = len(x)
     if n == 0:
         return 0.0
-    mean = np.mean(x)
-    if mean == 0:
+    total = x.sum()
+    if total == 0:
         return 0.0
-    
-    # Sum of absolute pairwise differences
-    diff_sum = np.abs(x[:, None] - x[None, :]).sum()
-    
-    return diff_sum / (2 * n * n * mean)
+
+    weights = 2 * np.arange(1, n + 1) - n - 1
+    return float(weights @ x / (n * total))
+
+
+def batched_gini(values):
+    """
+    Gini coefficient of every row of a (trials, n) array; returns (trials,).
+    Rows with zero mean get 0, as in gini().
+    """
+    x = np.sort(np.atleast_2d(np.asarray(values, dtype=float)), axis=1)
+    n = x.shape[1]
+    if n == 0:
+        return np.zeros(len(x))
+
+    weights = 2 * np.arange(1, n + 1) - n - 1
+    total = x.sum(axis=1)
+    out = np.zeros(len(x))
+    nonzero = total != 0
+    out[nonzero] = (x[nonzero] @ weights) / (n * total[nonzero])
+    return out
+
 
 def justified_envy(seniority_order, U, matches):
-    justified_envy_by_rank = []
-    for p_i, crew_i in enumerate(seniority_order):
-        justified_envy = 0
-        own_line = matches[crew_i]
-        own_utilities = U[crew_i, :]
-        for crew_j in seniority_order[p_i:]:
-            other_line = matches[crew_j]
-            if own_utilities[other_line] > own_utilities[own_line]:
-                justified_envy += 1
-        justified_envy_by_rank.append(justified_envy)
-    return np.array(justified_envy_by_rank)
+    """
+    Number of crew at or below each seniority position whose line the crew
+    at that position strictly prefers to their own.
+
+    seniority_order: crew ids, most senior first
+    U: utility matrix (n_crew, n_lines)
+    matches: dict {crew: line} or array with matches[crew] = line
+
+    Returns an array indexed by seniority position.
+    """
+    order = np.asarray(seniority_order)
+    lines = np.array([matches[c] for c in order])
+
+    U_ord = U[order]                          # rows in seniority order
+    V = U_ord[:, lines]                       # V[a, b] = u_a(line of b)
+    own = V[np.arange(len(order)), np.arange(len(order))]
+
+    junior = np.triu(np.ones((len(order), len(order)), dtype=bool))
+    return ((V > own[:, None]) & junior).sum(axis=1)
+
+
+def batched_justified_envy(seniority_order, U, assignments, max_elements=2**24):
+    """
+    justified_envy for many matchings at once.
+
+    assignments: (trials, n_crew) array, assignments[t, crew] = line, -1
+                 for unmatched crew (e.g. from sd.batched_serial_dictatorship)
+    Returns (trials, n_crew) justified envy by seniority position.
+    Trials are processed in chunks of at most max_elements comparisons.
+    """
+    order = np.asarray(seniority_order)
+    A = np.atleast_2d(np.asarray(assignments))[:, order]
+    trials, n = A.shape
+
+    # unmatched crew (line -1) hold a zero-utility column nobody envies
+    U_ord = np.concatenate([U[order], np.zeros((n, 1))], axis=1)
+    A = np.where(A >= 0, A, U.shape[1])
+    rows = np.arange(n)
+    junior = np.triu(np.ones((n, n), dtype=bool))
+
+    out = np.empty((trials, n), dtype=int)
+    chunk = max(1, max_elements // max(1, n * n))
+    for s in range(0, trials, chunk):
+        lines = A[s:s + chunk]
+        V = U_ord[rows[None, :, None], lines[:, None, :]]    # (t, a, b) = u_a(line of b)
+        own = U_ord[rows[None, :], lines]                      # (t, a)
+        out[s:s + chunk] = ((V > own[:, :, None]) & junior).sum(axis=2)
+    return out
@@ -0,0 +1,128 @@
+import os
+import numpy as np
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+
+# ------------------------------------------------------------
+# Global best clearing error, shared by all trajectories
+# ------------------------------------------------------------
+_shared_best = None
+
+
+def _init_worker(shared_best):
+    global _shared_best
+    _shared_best = shared_best
+
+
+def _publish(best_error):
+    """Record a trajectory's best error; return the global best."""
+    with _shared_best.get_lock():
+        if best_error < _shared_best.value:
+            _shared_best.value = best_error
+        return _shared_best.value
+
+
+def _run_start(args):
+    """
+    args = (k, make_aceei, make_args, start_prices, grace, cutoff, pool_processes)
+    Runs one price trajectory and returns its best iterate.
+    """
+    k, make_aceei, make_args, start_prices, grace, cutoff, pool_processes = args
+    aceei = make_aceei(*make_args)
+    if aceei.processes is None:
+        aceei.processes = pool_processes
+
+    def should_stop(iteration, best_error):
+        global_best = _publish(best_error)
+        # someone already cleared the market
+        if global_best <= aceei.tol:
+            return True
+        # laggard: well behind the global best after a grace period
+        return iteration >= grace and best_error > cutoff * global_best
+
+    prices, budgets, bundles = aceei.run(initial_prices=start_prices, should_stop=should_stop)
+    _publish(aceei.best_error)
+
+    report = aceei.report()
+    report["start"] = k
+    return report, prices, budgets, bundles
+
+
+def starting_prices(n_starts, n_items, rng=None, high=1.0, heuristic=None):
+    """
+    Start 0 is all-zero prices (the usual tatonnement start), then the
+    optional heuristic vector (e.g. scaled popularity), then uniform random
+    prices in [0, high].
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+
+    starts = [np.zeros(n_items)]
+    if heuristic is not None:
+        starts.append(np.asarray(heuristic, dtype=float))
+    while len(starts) < n_starts:
+        starts.append(rng.uniform(0, high, size=n_items))
+    return starts[:n_starts]
+
+
+def popularity_prices(utilities, budgets0, capacities):
+    """
+    Heuristic start: price items by how many agents rank them in their
+    top-capacity items, scaled so the most popular item costs the mean budget.
+    utilities: (n_agents, n_items) array
+    """
+    utilities = np.asarray(utilities)
+    n_items = utilities.shape[1]
+    k = max(1, int(np.ceil(np.sum(capacities) / len(utilities))))
+
+    top = np.argsort(-utilities, axis=1)[:, :k]
+    counts = np.bincount(top.ravel(), minlength=n_items).astype(float)
+    excess = np.maximum(counts - np.asarray(capacities), 0.0)
+    if excess.max() == 0:
+        return np.zeros(n_items)
+    return np.mean(budgets0) * excess / excess.max()
+
+
+def run_multistart(make_aceei, make_args=(), n_items=None, n_starts=4, processes=None,
+                   starts=None, seed=None, price_high=1.0, grace=20, cutoff=2.0):
+    """
+    Launch several A-CEEI price trajectories in parallel worker processes.
+
+    make_aceei: picklable top-level function returning a fresh ACEEI (Gurobi
+                models cannot be pickled, so each worker builds its own
+                agents); called as make_aceei(*make_args)
+    n_items: market size, needed when `starts` is not given
+    starts: list of starting price vectors; default from starting_prices()
+    processes: trajectories run at once (default: n_starts, capped at the
+               core count)
+    grace, cutoff: after `grace` iterations a trajectory whose best error is
+                   above cutoff * (global best error) is cut early
+
+    Each ACEEI still runs its own demand pool; unless make_aceei sets its
+    `processes`, the cores are split evenly between the trajectories.
+
+    Returns (prices, budgets, bundles, reports) for the best trajectory,
+    with one report dict per start.
+    """
+    if starts is None:
+        if n_items is None:
+            raise ValueError("n_items is required when starts are not given")
+        starts = starting_prices(n_starts, n_items, np.random.default_rng(seed), price_high)
+
+    cores = os.cpu_count() or 1
+    workers = processes or max(1, min(len(starts), cores))
+    pool_processes = max(1, cores // workers)
+
+    shared_best = mp.Value("d", np.inf)
+    tasks = [(k, make_aceei, make_args, p, grace, cutoff, pool_processes)
+             for k, p in enumerate(starts)]
+
+    with ProcessPoolExecutor(max_workers=workers,
+                             initializer=_init_worker,
+                             initargs=(shared_best,)) as ex:
+        results = list(ex.map(_run_start, tasks))
+
+    reports = [r[0] for r in results]
+    best = min(range(len(results)), key=lambda k: reports[k]["best_error"])
+    _, prices, budgets, bundles = results[best]
+    return prices, budgets, bundles, reports
@@ -0,0 +1,164 @@
+import numpy as np
+
+# Line features used for preferences: legs, overnights, credit hours
+FEATURES = ("num_legs", "overnights", "flight_time")
+
+
+def line_features(lines, features=FEATURES):
+    """
+    lines: dict {line id: line dict} as in lines.pickle
+    Returns F (num_features, num_lines), each feature row normalized to unit
+    L2 norm.
+    """
+    F = np.zeros((len(features), len(lines)))
+    for id, line in lines.items():
+        F[:, id] = [line[f] for f in features]
+    return F / np.linalg.norm(F, ord=2, axis=1, keepdims=True)
+
+
+def preference_generator(rng, num_agents, num_features):
+    """
+    Generate positive-only, heterogeneous agent preferences.
+    Produces stable tatonnement behavior and avoids agents wanting nothing.
+    """
+
+    # --- Step 1: Define heterogeneous preference clusters ---
+    cluster_centers = np.array([
+        [1.2, 0.6, 0.8],   # Type A: CH-heavy, also likes other features
+        [0.8, 1.4, 0.5],   # Type B: overnight-like (if relevant later)
+        [0.5, 0.7, 1.8],   # Type C: strongly credit-hour oriented
+        [1.0, 1.0, 1.0],   # Type D: balanced
+        [0.4, 1.6, 0.6],   # Type E: prefers fewer legs, more rest
+    ])
+
+    K = cluster_centers.shape[0]
+
+    # --- Step 2: Assign agent types ---
+    assignments = rng.integers(0, K, size=num_agents)
+
+    # --- Step 3: Add relatively large noise to diversify preferences ---
+    noise = rng.normal(0, 0.4, size=(num_agents, num_features))
+
+    W = cluster_centers[assignments] + noise
+
+    # --- Step 4: Enforce positivity ---
+    # Replace any negative weights with small positive values
+    W = np.clip(W, a_min=0.05, a_max=None)
+
+    # --- Step 5: Normalize for stability ---
+    W = W / np.linalg.norm(W, axis=1, keepdims=True)
+
+    return W
+
+
+def rank(U):
+    """Preference lists (best line first) from a utility matrix."""
+    return np.argsort(-U, axis=1)
+
+
+# ------------------------------------------------------------
+# Large populations: vectorized weights, top-k preference prefixes
+# ------------------------------------------------------------
+# Crew types of preferences.ipynb: legs-, overnight- and credit-oriented
+TYPE_BASES = np.array([
+    [1.0, 0.2, 0.1],
+    [0.2, 1.0, 0.3],
+    [0.3, 0.2, 1.0],
+])
+
+
+def generate_weights(rng, num_agents, epsilon=0.2, bases=TYPE_BASES):
+    """
+    Vectorized generate_weights of preferences.ipynb: agent i has type
+    i % len(bases), plus epsilon * N(0, 1) noise, made positive (abs) and
+    normalized to unit L2 norm. Returns (num_agents, num_features).
+    """
+    types = np.arange(num_agents) % len(bases)
+    W = np.abs(bases[types] + epsilon * rng.standard_normal((num_agents, bases.shape[1])))
+    return W / np.linalg.norm(W, axis=1, keepdims=True)
+
+
+def top_k(U, k):
+    """
+    First k columns of rank(U) without sorting whole rows: argpartition,
+    then sort only the k-prefix. Returns (n, k) int32.
+    """
+    U = np.atleast_2d(U)
+    k = min(k, U.shape[1])
+    if k == 0:
+        return np.empty((U.shape[0], 0), dtype=np.int32)
+    part = np.argpartition(-U, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(U, part, axis=1), axis=1, kind="stable")
+    return np.take_along_axis(part, order, axis=1).astype(np.int32)
+
+
+class LinearUtility:
+    """
+    u(i, j) = W[i] @ F[:, j], evaluated on demand so the (n, m) utility
+    matrix never has to exist.
+    """
+
+    def __init__(self, W, F):
+        self.W = np.asarray(W, dtype=float)
+        self.F = np.asarray(F, dtype=float)
+
+    @property
+    def shape(self):
+        return self.W.shape[0], self.F.shape[1]
+
+    def __call__(self, i):
+        """Crew i's utility for every line, (m,)."""
+        return self.W[i] @ self.F
+
+    def rows(self, idx):
+        return self.W[idx] @ self.F
+
+    def chunks(self, chunk=1024):
+        """Stream (rows slice, U[rows]) blocks of at most chunk crew."""
+        n = self.W.shape[0]
+        for s in range(0, n, chunk):
+            rows = slice(s, min(n, s + chunk))
+            yield rows, self.W[rows] @ self.F
+
+
+class TopKPreferences:
+    """
+    Preference prefixes of a whole population: prefix[i] holds crew i's k
+    favourite lines, best first, computed chunk by chunk from W @ F.
+    Memory is O(n * k) instead of the O(n * m) of rank(U).
+
+    choices(i, length) lazily extends one crew's list past k when a caller
+    needs it; extensions are cached per crew.
+
+        W = generate_weights(rng, 10_000)
+        prefs = TopKPreferences(W, F, k=64)
+        prefs.prefix[i], prefs.choices(i, 200), prefs.utility(i)
+    """
+
+    def __init__(self, W, F, k=64, chunk=1024):
+        self.utility = LinearUtility(W, F)
+        self.k = min(k, self.utility.shape[1])
+        self.prefix = np.empty((self.utility.shape[0], self.k), dtype=np.int32)
+        for rows, U in self.utility.chunks(chunk):
+            self.prefix[rows] = top_k(U, self.k)
+        self.extended = {}
+
+    @property
+    def n_lines(self):
+        return self.utility.shape[1]
+
+    def choices(self, i, length):
+        """Crew i's first `length` lines, best first."""
+        if length <= self.k:
+            return self.prefix[i, :length]
+        have = self.extended.get(i)
+        if have is None or len(have) < length:
+            # grow geometrically so repeated exhaustion stays cheap
+            size = min(self.n_lines, max(length, 2 * (len(have) if have is not None else self.k)))
+            have = top_k(self.utility(i), size)[0]
+            self.extended[i] = have
+        return have[:length]
+
+    @property
+    def nbytes(self):
+        return self.prefix.nbytes + sum(v.nbytes for v in self.extended.values())
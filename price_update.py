@@ -0,0 +1,196 @@
+import numpy as np
+from collections import deque
+
+
+class PriceStrategy:
+    """
+    Price update rule for the A-CEEI tatonnement.
+
+    step() gets the current prices, the evaluation of those prices (a dict
+    with "z", "clipped" and "error", see ACEEI.evaluate) and an `evaluate`
+    callback that scores other candidate prices; it returns the next prices.
+    Only search-style strategies call `evaluate`, since every call costs a
+    full subregion enumeration plus two ILP solves.
+    """
+
+    name = "base"
+
+    def reset(self, prices):
+        """Called once at the start of every ACEEI.run."""
+        pass
+
+    def step(self, prices, result, evaluate):
+        raise NotImplementedError
+
+    def reuse(self, prices):
+        """
+        The `evaluate` result for `prices` if the last step() already
+        computed it (so the driver need not solve it again), else None.
+        """
+        return None
+
+
+class FixedStep(PriceStrategy):
+    """p <- p + delta * clip(z); the original tatonnement."""
+
+    name = "fixed"
+
+    def __init__(self, delta=0.01):
+        self.delta = delta
+
+    def step(self, prices, result, evaluate):
+        return prices + self.delta * result["clipped"]
+
+
+class AdaptiveStep(PriceStrategy):
+    """
+    Fixed-direction step whose length grows while the clearing error falls
+    or plateaus (demand has not reacted yet) and shrinks when it rises,
+    which damps cycling.
+    """
+
+    name = "adaptive"
+
+    def __init__(self, delta=0.01, grow=1.2, shrink=0.5, min_step=1e-4, max_step=1.0):
+        self.delta = delta
+        self.grow = grow
+        self.shrink = shrink
+        self.min_step = min_step
+        self.max_step = max_step
+
+    def reset(self, prices):
+        self.step_size = self.delta
+        self.last_error = np.inf
+
+    def step(self, prices, result, evaluate):
+        if result["error"] > self.last_error:
+            self.step_size = max(self.step_size * self.shrink, self.min_step)
+        else:
+            self.step_size = min(self.step_size * self.grow, self.max_step)
+        self.last_error = result["error"]
+
+        return prices + self.step_size * result["clipped"]
+
+
+class Momentum(PriceStrategy):
+    """
+    Heavy-ball (or Nesterov) tatonnement:
+        v <- beta * v + delta * clip(z)
+        p <- max(0, p + v)                 (Nesterov: p + beta * v + delta * clip(z))
+    """
+
+    name = "momentum"
+
+    def __init__(self, delta=0.01, beta=0.9, nesterov=False):
+        self.delta = delta
+        self.beta = beta
+        self.nesterov = nesterov
+        if nesterov:
+            self.name = "nesterov"
+
+    def reset(self, prices):
+        self.velocity = np.zeros(len(prices))
+
+    def step(self, prices, result, evaluate):
+        g = self.delta * result["clipped"]
+        self.velocity = self.beta * self.velocity + g
+
+        if self.nesterov:
+            new_prices = prices + self.beta * self.velocity + g
+        else:
+            new_prices = prices + self.velocity
+
+        # negative prices are meaningless; drop the momentum that pushed there
+        negative = new_prices < 0
+        self.velocity[negative] = 0.0
+        return np.maximum(new_prices, 0.0)
+
+
+class TabuSearch(PriceStrategy):
+    """
+    Neighbour search over prices in the style of the original A-CEEI
+    heuristic (Othman, Sandholm & Budish).
+
+    Neighbours are gradient steps of several lengths plus "individual
+    adjustment" moves that only fix the most over/under-demanded item. Each
+    neighbour is evaluated and the one with the lowest clearing error whose
+    excess-demand vector was not seen recently is taken; the tabu list of
+    demand vectors is what stops the search from cycling.
+    """
+
+    name = "tabu"
+
+    def __init__(self, delta=0.01, step_scales=(0.5, 1.0, 2.0, 4.0),
+                 n_individual=2, tabu_size=50):
+        self.delta = delta
+        self.step_scales = step_scales
+        self.n_individual = n_individual
+        self.tabu_size = tabu_size
+
+    def reset(self, prices):
+        self.tabu = deque(maxlen=self.tabu_size)
+        self._chosen = None
+
+    @staticmethod
+    def _demand_key(z):
+        return tuple(np.round(z, 6))
+
+    def neighbors(self, prices, result):
+        z = result["clipped"]
+        candidates = [prices + s * self.delta * z for s in self.step_scales]
+
+        # individual adjustments on the largest |z_j|
+        for j in np.argsort(-np.abs(z))[:self.n_individual]:
+            if z[j] == 0:
+                break
+            p = prices.copy()
+            if z[j] > 0:
+                p[j] += self.delta * max(1.0, z[j])
+            else:
+                p[j] = max(0.0, p[j] - self.delta * max(1.0, -z[j]))
+            candidates.append(p)
+
+        return [np.maximum(p, 0.0) for p in candidates]
+
+    def step(self, prices, result, evaluate):
+        self.tabu.append(self._demand_key(result["z"]))
+
+        scored = []
+        for p in self.neighbors(prices, result):
+            r = evaluate(p)
+            tabu = self._demand_key(r["z"]) in self.tabu
+            scored.append((r["error"], -np.abs(p - prices).sum(), tabu, p, r))
+
+        # lowest error among non-tabu neighbours; ties go to the longer
+        # move, so plateaus are crossed instead of re-taking the shortest step
+        fresh = [s for s in scored if not s[2]]
+        pool = fresh if fresh else scored
+        _, _, _, best, r = min(pool, key=lambda s: (s[0], s[1]))
+        self._chosen = (best, r)
+        return best
+
+    def reuse(self, prices):
+        chosen, self._chosen = self._chosen, None
+        if chosen is not None and np.array_equal(chosen[0], prices):
+            return chosen[1]
+        return None
+
+
+STRATEGIES = {
+    "fixed": FixedStep,
+    "adaptive": AdaptiveStep,
+    "momentum": Momentum,
+    "nesterov": lambda delta=0.01, **kw: Momentum(delta, nesterov=True, **kw),
+    "tabu": TabuSearch,
+}
+
+
+def make_strategy(strategy, delta):
+    """strategy: PriceStrategy instance, name in STRATEGIES, or None (fixed)."""
+    if strategy is None:
+        return FixedStep(delta)
+    if isinstance(strategy, str):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"unknown price strategy: {strategy}")
+        return STRATEGIES[strategy](delta=delta)
+    return strategy
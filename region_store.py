@@ -0,0 +1,154 @@
+import numpy as np
+
+
+def pack_bundles(bundles, n_words=None):
+    """
+    bundles: (R, n_items) 0/1 array
+    Returns (R, n_words) uint64 bit-packed bundles (item j = bit j).
+    """
+    bundles = np.atleast_2d(np.asarray(bundles))
+    n_items = bundles.shape[1]
+    if n_words is None:
+        n_words = max(1, -(-n_items // 64))
+
+    packed = np.packbits(bundles.astype(bool), axis=1, bitorder="little")
+    padded = np.zeros((len(bundles), 8 * n_words), dtype=np.uint8)
+    padded[:, :packed.shape[1]] = packed
+    return padded.view(np.uint64)
+
+
+def unpack_bundles(words, n_items):
+    """Inverse of pack_bundles: (R, n_words) uint64 -> (R, n_items) int array."""
+    words = np.ascontiguousarray(np.atleast_2d(words), dtype=np.uint64)
+    bits = np.unpackbits(words.view(np.uint8), axis=1, count=n_items, bitorder="little")
+    return bits.astype(int)
+
+
+def bundle_key(bundle):
+    """Hashable packed key of a single 0/1 bundle."""
+    return pack_bundles(bundle)[0].tobytes()
+
+
+class RegionStore:
+    """
+    Budget subregions of all agents in one compact structure.
+
+    Region r belongs to agent index owner[r]; agent a owns rows
+    offsets[a]:offsets[a+1] (CSR layout), in increasing budget order.
+    Bundles are stored as packed uint64 words, so a bundle's key is a short
+    bytes object and equality is a word comparison.
+
+    words   : (R, n_words) uint64 packed bundles
+    starts  : (R,) region start budget
+    ends    : (R,) region end budget
+    offsets : (n_agents + 1,) row offsets per agent
+    """
+
+    def __init__(self, agent_ids, n_items, words, starts, ends, offsets):
+        self.agent_ids = list(agent_ids)
+        self.index = {i: a for a, i in enumerate(self.agent_ids)}
+        self.n_items = n_items
+        self.words = words
+        self.starts = np.asarray(starts, dtype=float)
+        self.ends = np.asarray(ends, dtype=float)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+
+        counts = np.diff(self.offsets)
+        self.owner = np.repeat(np.arange(len(self.agent_ids)), counts)
+        self.local = np.arange(len(self.starts)) - self.offsets[self.owner]
+        self._matrix = None
+
+    # ------------------------------------------------------------
+    # Construction
+    # ------------------------------------------------------------
+    @classmethod
+    def from_grids(cls, agent_ids, grids, grid_bundles, delta):
+        """
+        Merge per-agent demand on a budget grid into regions.
+
+        grids[i]: budgets of agent i's grid
+        grid_bundles[i]: demand bundle at each of those budgets
+        Same regions as crew.build_regions, without per-bundle tuples.
+        """
+        words, starts, ends, offsets = [], [], [], [0]
+        n_items = None
+
+        for i in agent_ids:
+            budgets = np.asarray(grids[i], dtype=float)
+            packed = pack_bundles(np.array(grid_bundles[i]))
+            n_items = len(grid_bundles[i][0])
+
+            # first grid point of every run of equal bundles
+            changed = np.any(packed[1:] != packed[:-1], axis=1)
+            first = np.concatenate(([0], np.flatnonzero(changed) + 1))
+
+            words.append(packed[first])
+            starts.append(budgets[first])
+            ends.append(np.append(budgets[first[1:]] - delta, budgets[-1]))
+            offsets.append(offsets[-1] + len(first))
+
+        return cls(agent_ids, n_items, np.vstack(words),
+                   np.concatenate(starts), np.concatenate(ends), offsets)
+
+    @classmethod
+    def from_regions(cls, all_regions, agent_ids=None):
+        """all_regions: agent id -> [(bundle, start, end), ...]"""
+        if agent_ids is None:
+            agent_ids = list(all_regions.keys())
+
+        bundles, starts, ends, offsets = [], [], [], [0]
+        for i in agent_ids:
+            for bundle, start, end in all_regions[i]:
+                bundles.append(bundle)
+                starts.append(start)
+                ends.append(end)
+            offsets.append(len(bundles))
+
+        return cls(agent_ids, len(bundles[0]), pack_bundles(np.array(bundles)),
+                   starts, ends, offsets)
+
+    # ------------------------------------------------------------
+    # Access
+    # ------------------------------------------------------------
+    def __len__(self):
+        return len(self.starts)
+
+    def rows(self, agent_id):
+        """Row range of an agent's regions."""
+        a = self.index[agent_id]
+        return range(self.offsets[a], self.offsets[a + 1])
+
+    def row(self, agent_id, l):
+        """Row of region l of an agent."""
+        return int(self.offsets[self.index[agent_id]] + l)
+
+    def n_regions(self, agent_id):
+        return len(self.rows(agent_id))
+
+    def key(self, r):
+        """Hashable bundle key of row r (O(1) hashing and equality)."""
+        return self.words[r].tobytes()
+
+    def same_bundle(self, r, s):
+        return bool(np.array_equal(self.words[r], self.words[s]))
+
+    def bundle(self, r):
+        """0/1 bundle of row r."""
+        return unpack_bundles(self.words[r], self.n_items)[0]
+
+    def bundle_matrix(self):
+        """All bundles as an (R, n_items) 0/1 array (cached)."""
+        if self._matrix is None:
+            self._matrix = unpack_bundles(self.words, self.n_items)
+        return self._matrix
+
+    def signature(self, agent_id):
+        """Bytes identifying an agent's whole region list, for change detection."""
+        rows = slice(*self.offsets[self.index[agent_id]:self.index[agent_id] + 2])
+        return (self.words[rows].tobytes()
+                + self.starts[rows].tobytes()
+                + self.ends[rows].tobytes())
+
+    def regions(self, agent_id):
+        """Agent's regions in the classic [(bundle, start, end), ...] form."""
+        return [(self.bundle(r), self.starts[r], self.ends[r]) for r in self.rows(agent_id)]
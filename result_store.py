@@ -0,0 +1,163 @@
+import os
+import json
+import numpy as np
+from numpy.lib.format import open_memmap
+
+
+class ResultStore:
+    """
+    On-disk, memory-mapped results of an experiment campaign.
+
+    Every metric is one preallocated .npy file of shape
+        (n_configs, n_scenarios) + per-scenario shape
+    where a config is a (mechanism, parameter) pair such as ("k", 5) or
+    ("eps", 2.0). A (n_configs, n_scenarios) completion mask records which
+    cells were fully written; it is flushed only after the data, so after an
+    interruption the campaign resumes at the first incomplete scenario and
+    half-written cells are simply redone.
+
+    Arrays are opened lazily as memmaps, so summaries can be computed in
+    scenario chunks without loading whole arrays into RAM.
+
+    directory/
+        meta.json       configs, n_scenarios, metric shapes and dtypes
+        done.npy        completion mask
+        <metric>.npy    one per metric
+    """
+
+    def __init__(self, directory, mode="r+"):
+        """Open an existing store; mode "r" for read-only analysis."""
+        self.directory = directory
+        self.mode = mode
+        with open(os.path.join(directory, "meta.json")) as f:
+            meta = json.load(f)
+
+        self.configs = [tuple(c) for c in meta["configs"]]
+        self.index = {c: a for a, c in enumerate(self.configs)}
+        self.n_scenarios = meta["n_scenarios"]
+        self.metrics = {name: (tuple(shape), dtype) for name, (shape, dtype) in meta["metrics"].items()}
+        self.attrs = meta.get("attrs", {})
+        self._arrays = {}
+
+    @classmethod
+    def create(cls, directory, configs, n_scenarios, metrics, attrs=None):
+        """
+        configs: list of (mechanism, parameter) pairs
+        metrics: name -> (per-scenario shape, dtype), e.g.
+                 {"total": ((n_trials,), "float64"), "envy": ((n_trials, n_crew), "int16")}
+        attrs: JSON-serializable run settings kept with the store
+
+        Opens the existing store instead if `directory` already holds one
+        with the same layout (resume); a different layout is an error.
+        """
+        meta = {
+            "configs": [list(c) for c in configs],
+            "n_scenarios": int(n_scenarios),
+            "metrics": {name: [list(shape), np.dtype(dtype).str] for name, (shape, dtype) in metrics.items()},
+            "attrs": attrs or {},
+        }
+
+        path = os.path.join(directory, "meta.json")
+        if os.path.exists(path):
+            with open(path) as f:
+                existing = json.load(f)
+            if existing != meta:
+                raise ValueError(f"{directory} holds a result store with a different layout")
+            return cls(directory)
+
+        os.makedirs(directory, exist_ok=True)
+        n_configs = len(configs)
+        for name, (shape, dtype) in metrics.items():
+            open_memmap(os.path.join(directory, f"{name}.npy"), mode="w+", dtype=dtype,
+                        shape=(n_configs, n_scenarios) + tuple(shape)).flush()
+        open_memmap(os.path.join(directory, "done.npy"), mode="w+", dtype=bool,
+                    shape=(n_configs, n_scenarios)).flush()
+
+        # meta.json last: its presence marks a complete layout
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp, path)
+        return cls(directory)
+
+    # ------------------------------------------------------------
+    # Lazy arrays
+    # ------------------------------------------------------------
+    def array(self, name):
+        """Memmap of a metric (or "done")."""
+        if name not in self._arrays:
+            self._arrays[name] = np.load(os.path.join(self.directory, f"{name}.npy"),
+                                         mmap_mode=self.mode)
+        return self._arrays[name]
+
+    @property
+    def done(self):
+        return self.array("done")
+
+    def completed_scenarios(self):
+        """Scenarios written for every config."""
+        return np.flatnonzero(self.done.all(axis=0))
+
+    def pending_scenarios(self):
+        return np.flatnonzero(~self.done.all(axis=0))
+
+    # ------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------
+    def write(self, config, scenario, **values):
+        """Store one config's metrics for one scenario, then mark it done."""
+        a = self.index[tuple(config)]
+        for name, value in values.items():
+            self.array(name)[a, scenario] = value
+        for name in values:
+            self.array(name).flush()
+        self.done[a, scenario] = True
+        self.done.flush()
+
+    # ------------------------------------------------------------
+    # Chunked summaries
+    # ------------------------------------------------------------
+    def per_scenario(self, name, config, reduce=None, baseline=None, chunk=256):
+        """
+        Yield per-scenario values of a metric over completed scenarios, one
+        chunk of scenarios at a time.
+
+        reduce: axes of the per-scenario shape to average (e.g. (0,) for
+                the trial axis of a (n_trials, n_crew) metric)
+        baseline: optional config subtracted scenario by scenario
+        """
+        rows = self.completed_scenarios()
+        a = self.index[tuple(config)]
+        b = None if baseline is None else self.index[tuple(baseline)]
+        X = self.array(name)
+
+        for s in range(0, len(rows), chunk):
+            idx = rows[s:s + chunk]
+            x = np.asarray(X[a, idx], dtype=float)
+            if b is not None:
+                x = x - np.asarray(X[b, idx], dtype=float)
+            if reduce:
+                x = x.mean(axis=tuple(1 + ax for ax in reduce))
+            yield x
+
+    def summary(self, name, config, reduce=None, baseline=None, chunk=256):
+        """
+        Mean and standard error across completed scenarios, read in chunks
+        (chunk statistics are merged with Chan's parallel variance update).
+        """
+        n, mean, m2 = 0, 0.0, 0.0
+        for x in self.per_scenario(name, config, reduce, baseline, chunk):
+            k = len(x)
+            x_mean = x.mean(axis=0)
+            x_m2 = ((x - x_mean) ** 2).sum(axis=0)
+
+            d = x_mean - mean
+            mean = mean + d * k / (n + k)
+            m2 = m2 + x_m2 + d ** 2 * n * k / (n + k)
+            n += k
+
+        if n == 0:
+            return np.nan, np.nan
+        if n < 2:
+            return mean, np.full(np.shape(mean), np.nan)
+        return mean, np.sqrt(m2 / (n - 1) / n)
@@ -1,13 +1,20 @@
 import numpy as np
 
-def serial_dictatorship(preferences, order, lines):
+def serial_dictatorship(preferences, order, lines, utility=None):
     """
     preferences: 2D array where preferences[i] is the preference list of crew i
     order: list of crew indices indicating the order in which they pick
     lines: list of available lines
+    utility: optional utility matrix (n_crew, n_lines) or function
+             utility(crew) -> (n_lines,); with it (or with a TopKPreferences
+             as preferences) the lists may be truncated prefixes, see
+             truncated_serial_dictatorship
 
     Returns a matching dict {crew: line}
     """
+    if utility is not None or hasattr(preferences, "prefix"):
+        return truncated_serial_dictatorship(preferences, order, lines, utility)
+
     available_lines = set(lines.keys())
     matching = {}
 
@@ -22,17 +29,152 @@ def serial_dictatorship(preferences, order, lines):
     return matching
 
 
-def random_serial_dictatorship(preferences, lines, rng=None):
+def _utility_rows(utility, crew):
+    """Utility rows (len(crew), n_lines) from a matrix, LinearUtility or function."""
+    if hasattr(utility, "rows"):
+        return utility.rows(crew)
+    if callable(utility):
+        return np.array([utility(c) for c in crew], dtype=float).reshape(len(crew), -1)
+    return np.asarray(utility)[crew]
+
+
+def _line_slots(lines, P):
+    if isinstance(lines, dict):
+        line_ids = np.fromiter(lines.keys(), dtype=int, count=len(lines))
+    else:
+        line_ids = np.arange(lines)
+    return line_ids, int(max(line_ids.max(initial=-1), P.max(initial=-1))) + 1
+
+
+def truncated_serial_dictatorship(prefixes, order, lines, utility=None):
+    """
+    Serial dictatorship from truncated preference lists.
+
+    prefixes: (n_crew, k) top-k lists (e.g. preferences.top_k) or a
+              preferences.TopKPreferences (which also supplies the utility)
+    utility: (n_crew, n_lines) matrix or function utility(crew) -> (n_lines,)
+
+    A crew takes the first line of its prefix that is still available. Only
+    when every prefix line is gone is its utility row consulted, for the best
+    remaining line, so memory is O(n * k) plus whatever the utility needs.
+    Without a utility, crew with an exhausted prefix stay unmatched.
+
+    Returns a matching dict {crew: line}, like serial_dictatorship.
+    """
+    if utility is None and hasattr(prefixes, "utility"):
+        utility = prefixes.utility
+    P = np.asarray(getattr(prefixes, "prefix", prefixes))
+
+    line_ids, n_slots = _line_slots(lines, P)
+    available = np.zeros(n_slots, dtype=bool)
+    available[line_ids] = True
+    n_left = len(line_ids)
+
+    matching = {}
+    for crew in order:
+        if n_left == 0:
+            break
+        candidates = P[crew]
+        free = available[candidates]
+        if free.any():
+            line = int(candidates[free.argmax()])
+        elif utility is not None:
+            row = _utility_rows(utility, [crew])[0]
+            m = min(len(row), n_slots)
+            row = np.where(available[:m], row[:m], -np.inf)
+            line = int(row.argmax())
+            if not available[line]:
+                continue
+        else:
+            continue
+        matching[crew] = line
+        available[line] = False
+        n_left -= 1
+
+    return matching
+
+
+def batched_serial_dictatorship(preferences, orders, lines, utility=None):
+    """
+    Serial dictatorship for many pick orders at once.
+
+    preferences: (n_crew, L) array, preferences[i] is crew i's preference list
+                 (may be truncated, L < number of lines)
+    orders: (trials, n_crew) array, one pick order per row
+    lines: dict of available lines (as in serial_dictatorship) or a line count
+    utility: optional (n_crew, n_lines) matrix or utility function; a crew
+             whose (truncated) list is used up then takes its best remaining
+             line, as in truncated_serial_dictatorship
+
+    Returns a (trials, n_crew) int array: assignment[t, crew] is the line
+    crew got in trial t, or -1 if nothing on their list was left.
+
+    Every trial keeps an availability bitmap; at each pick position all
+    trials advance a pointer into the picking crew's list until it hits an
+    available line, so the Python loop runs over picks, not trials.
+    """
+    if utility is None and hasattr(preferences, "utility"):
+        utility = preferences.utility
+    P = np.asarray(getattr(preferences, "prefix", preferences))
+    orders = np.atleast_2d(np.asarray(orders))
+    trials, n_picks = orders.shape
+    n_crew, L = P.shape
+
+    line_ids, n_slots = _line_slots(lines, P)
+
+    available = np.zeros((trials, n_slots), dtype=bool)
+    available[:, line_ids] = True
+    assignment = np.full((trials, n_crew), -1, dtype=int)
+
+    all_trials = np.arange(trials)
+    ptr = np.zeros(trials, dtype=int)
+    for s in range(n_picks):
+        crew = orders[:, s]
+        ptr[:] = 0
+        active = all_trials
+
+        while len(active):
+            exhausted = ptr[active] >= L
+            if utility is not None and exhausted.any():
+                _take_best_remaining(utility, crew, active[exhausted], available, assignment)
+            active = active[~exhausted]               # list exhausted: unmatched / fallback
+            line = P[crew[active], ptr[active]]
+            free = available[active, line]
+
+            won = active[free]
+            assignment[won, crew[won]] = line[free]
+            available[won, line[free]] = False
+
+            active = active[~free]
+            ptr[active] += 1
+
+    return assignment
+
+
+def _take_best_remaining(utility, crew, trials, available, assignment):
+    """Fallback of batched_serial_dictatorship for trials whose list ran out."""
+    rows = _utility_rows(utility, crew[trials])
+    m = min(rows.shape[1], available.shape[1])
+    rows = np.where(available[trials, :m], rows[:, :m], -np.inf)
+    best = rows.argmax(axis=1)
+    ok = np.isfinite(rows[np.arange(len(trials)), best])
+
+    won = trials[ok]
+    assignment[won, crew[won]] = best[ok]
+    available[won, best[ok]] = False
+
+
+def random_serial_dictatorship(preferences, lines, rng=None, utility=None):
     """
     rng: np.random.Generator
     """
-    n_crews = preferences.shape[0]
+    n_crews = np.shape(getattr(preferences, "prefix", preferences))[0]
     
     if rng is None:
         rng = np.random.default_rng()
         
     order = rng.permutation(n_crews)
-    return serial_dictatorship(preferences, order, lines)
+    return serial_dictatorship(preferences, order, lines, utility)
 
 
 def banded_permutation(seniority_order, k, rng=None):
@@ -50,10 +192,26 @@ def banded_permutation(seniority_order, k, rng=None):
     return np.array(permuted)
 
 
+def banded_permutations(seniority_order, k, trials, rng=None):
+    """
+    `trials` k-band orders at once, as a (trials, n) array.
+
+    Every position gets key band + U[0, 1), so sorting each row's keys keeps
+    bands in seniority order and shuffles uniformly within each band.
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+
+    seniority_order = np.asarray(seniority_order)
+    n = len(seniority_order)
+    keys = np.arange(n) // k + rng.random((trials, n))
+    return seniority_order[np.argsort(keys, axis=1)]
+
+
 
-def k_band_serial_dictatorship(preferences, seniority_order, lines, k, rng=None):
+def k_band_serial_dictatorship(preferences, seniority_order, lines, k, rng=None, utility=None):
     permuted_order = banded_permutation(seniority_order, k, rng)
-    return serial_dictatorship(preferences, permuted_order, lines), permuted_order
+    return serial_dictatorship(preferences, permuted_order, lines, utility), permuted_order
 
 
 def epsilon_shuffle_order(seniority_order, eps, rng):
@@ -68,7 +226,16 @@ def epsilon_shuffle_order(seniority_order, eps, rng):
 
 
 
-def epsilon_serial_dictatorship(preferences, seniority_order, lines, eps, rng):
+def epsilon_shuffle_orders(seniority_order, eps, trials, rng):
+    """`trials` epsilon-noise orders at once, as a (trials, n) array."""
+    seniority_order = np.asarray(seniority_order)
+    n = len(seniority_order)
+
+    perturbed = np.arange(n) + eps * rng.normal(0, 1, size=(trials, n))
+    return seniority_order[np.argsort(perturbed, axis=1)]
+
+
+def epsilon_serial_dictatorship(preferences, seniority_order, lines, eps, rng, utility=None):
     n = len(seniority_order)
 
     # correct: apply noise to ranks, not crew numbers
@@ -78,7 +245,7 @@ def epsilon_serial_dictatorship(preferences, seniority_order, lines, eps, rng):
     perturbed = ranks + eps * noise
     new_order = seniority_order[np.argsort(perturbed)]
     
-    return serial_dictatorship(preferences, new_order, lines), new_order
+    return serial_dictatorship(preferences, new_order, lines, utility), new_order
 
 
 
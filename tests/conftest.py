@@ -0,0 +1,9 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# modules are imported flat, as the scripts and notebooks do; bidline_sim
+# goes last so the top-level crew.py wins the name clash
+sys.path.insert(0, ROOT)
+sys.path.append(os.path.join(ROOT, "bidline_sim"))
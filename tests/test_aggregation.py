@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from aggregation import ItemAggregation, run_aggregated
+from conflict_graph import ConflictGraph
+from crew import Crew
+from interval_demand import IntervalDemandOracle
+
+
+def twin_market(rng, n_base=8, copies=3, n_crew=4):
+    """Every base pairing appears `copies` times with the same span and values."""
+    starts = rng.integers(0, 40, n_base).astype(float)
+    base_spans = [(starts[k], starts[k] + rng.integers(2, 12)) for k in range(n_base)]
+    spans = {k * copies + c: base_spans[k] for k in range(n_base) for c in range(copies)}
+    graph = ConflictGraph.from_spans(spans)
+    U = np.repeat(rng.random((n_crew, n_base)), copies, axis=1)
+    budgets0 = 1.0 + 0.1 * np.linspace(1, 0, n_crew)
+    agents = [Crew(i, U[i], budgets0[i], conflicts=graph, spans=spans) for i in range(n_crew)]
+    return agents, np.ones(n_base * copies), budgets0
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_true_twins_give_an_exact_reduced_market(seed):
+    rng = np.random.default_rng(seed)
+    agents, capacities, budgets0 = twin_market(rng)
+    agg = ItemAggregation.from_agents(agents, capacities)
+    reduced = agg.reduce_agents(agents, budgets0)
+
+    assert agg.n_types == 8
+    assert np.array_equal(agg.capacities, np.full(8, 3.0))
+
+    # at any type prices, best item-level demand = best type-level demand
+    for _ in range(5):
+        prices = rng.random(agg.n_types)
+        for agent, r in zip(agents, reduced):
+            budget = budgets0[agent.id]
+            items = IntervalDemandOracle(agent.utilities, agent.spans).solve(agg.expand_prices(prices), budget)
+            types = IntervalDemandOracle(r.utilities, r.spans).solve(prices, budget)
+            assert agent.utilities @ items == pytest.approx(r.utilities @ types)
+
+
+def test_run_aggregated_disaggregates_to_valid_bundles():
+    agents, capacities, budgets0 = twin_market(np.random.default_rng(0))
+    graph = agents[0].graph
+    prices, budgets, bundles, agg = run_aggregated(agents, capacities, budgets0, oracle="interval",
+                                                   max_iter=50, observers=[])
+
+    assert prices.shape == capacities.shape
+    for i, bundle in bundles.items():
+        assert graph.valid(bundle)
+        assert prices @ bundle <= budgets[i] + 1e-9
+    # each concrete copy is used at most as often as its type is over-demanded
+    type_load = sum(np.bincount(agg.type_of, weights=b, minlength=agg.n_types) for b in bundles.values())
+    item_load = sum(bundles.values())
+    over = np.maximum(type_load - agg.capacities, 0)
+    assert (item_load <= 1 + np.ceil(over / 3)[agg.type_of]).all()
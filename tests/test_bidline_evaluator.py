@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from evaluator import AllocationEvaluator
+from preference_table import PreferenceTable
+from rules.kband_rule import KBandRule
+
+
+def brute_force(table, assignment):
+    """From-scratch metrics of one allocation (unmatched crew: utility 0)."""
+    n = table.n_crew
+    U = np.concatenate([table.utilities, np.zeros((n, 1))], axis=1)
+    col = np.where(assignment >= 0, assignment, table.n_pairings)
+    own = U[np.arange(n), col]
+    seniority = np.empty(n, dtype=int)
+    seniority[table.seniority_order()] = np.arange(n)
+
+    envy = monotonicity = 0
+    for c in range(n):
+        for b in range(n):
+            if b != c and U[c, col[b]] > own[c]:
+                envy += 1
+                monotonicity += seniority[b] >= seniority[c]
+
+    position = {(c, j): k + 1 for c in range(n) for k, j in enumerate(table.ranks[c])}
+    matched = [c for c in range(n) if assignment[c] >= 0]
+    obtained = [position[c, assignment[c]] if assignment[c] >= 0 else table.n_pairings + 1
+                for c in range(n)]
+
+    mean_abs = np.abs(own[:, None] - own[None, :]).mean()
+    return {
+        "welfare": own.sum(),
+        "mean_rank": np.mean([obtained[c] for c in matched]),
+        "envy": envy,
+        "monotonicity": monotonicity,
+        "gini": mean_abs / (2 * own.mean()),
+        "spearman": pd.Series(seniority).rank().corr(pd.Series(obtained).rank()),
+    }
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_incremental_metrics_match_brute_force(seed):
+    rng = np.random.default_rng(seed)
+    # more crew than pairings, so some crew stay unmatched
+    table = PreferenceTable(rng.random((14, 10)), seniority=rng.permutation(14))
+    trials = 4
+
+    ev = AllocationEvaluator(table, trials)
+    batch = KBandRule(3).allocate_table(table, trials, rng, evaluator=ev)
+    replayed = AllocationEvaluator.from_assignment(table, batch)
+
+    for e in (ev, replayed):
+        gini, spearman = e.gini(), e.spearman()
+        for t in range(trials):
+            expected = brute_force(table, batch[t])
+            assert e.welfare[t] == pytest.approx(expected["welfare"])
+            assert e.mean_rank[t] == pytest.approx(expected["mean_rank"])
+            assert e.envy_count[t] == expected["envy"]
+            assert e.monotonicity_violations[t] == expected["monotonicity"]
+            assert gini[t] == pytest.approx(expected["gini"])
+            assert spearman[t] == pytest.approx(expected["spearman"])
@@ -0,0 +1,59 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from preference_table import PreferenceTable
+from rules.aceei_rule import ACEEIRule
+from rules.epsilon_rule import EpsilonRule
+from rules.kband_rule import KBandRule
+from rules.senior_rule import SeniorRule
+
+
+def random_bid_period(rng, n_crew, n_pairings):
+    pairings = [SimpleNamespace(id=f"P{j}") for j in range(n_pairings)]
+    crew_list = []
+    for c in range(n_crew):
+        listed = rng.random(n_pairings) < 0.7
+        # coarse values so ties (kept in pairing order) actually occur
+        prefs = {p.id: float(rng.integers(0, 5)) for p, keep in zip(pairings, listed) if keep}
+        crew_list.append(SimpleNamespace(id=f"C{c}", seniority=int(rng.integers(0, 10)),
+                                         preferences=prefs))
+    return crew_list, pairings
+
+
+def sort_per_crew_senior(crew_list, pairings):
+    """The original SeniorRule loop: every crew re-sorts the remaining pairings."""
+    available = {p.id: p for p in pairings}
+    allocations = {}
+    for crew in sorted(crew_list, key=lambda c: c.seniority):
+        bids = sorted(available.values(), key=lambda p: crew.preferences.get(p.id, 0), reverse=True)
+        for pairing in bids:
+            if pairing.id in available:
+                allocations[crew.id] = pairing.id
+                del available[pairing.id]
+                break
+    return allocations
+
+
+@pytest.mark.parametrize("seed", range(10))
+@pytest.mark.parametrize("n_crew, n_pairings", [(8, 12), (12, 8), (5, 0)])
+def test_senior_rule_matches_sort_per_crew(seed, n_crew, n_pairings):
+    crew_list, pairings = random_bid_period(np.random.default_rng(seed), n_crew, n_pairings)
+    assert SeniorRule().allocate(crew_list, pairings) == sort_per_crew_senior(crew_list, pairings)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_degenerate_rules_reduce_to_seniority(seed):
+    rng = np.random.default_rng(seed)
+    table = PreferenceTable(rng.random((15, 20)), seniority=rng.permutation(15))
+    senior = SeniorRule().allocate_table(table, 3, rng)
+
+    assert np.array_equal(KBandRule(1).allocate_table(table, 3, rng), senior)
+    assert np.array_equal(EpsilonRule(0.0).allocate_table(table, 3, rng), senior)
+
+
+@pytest.mark.parametrize("rule", [SeniorRule(), KBandRule(3), EpsilonRule(0.5), ACEEIRule(max_iter=20)])
+def test_rules_without_pairings(rule):
+    table = PreferenceTable(np.zeros((4, 0)))
+    assert (rule.allocate_table(table, 2, np.random.default_rng(0)) == -1).all()
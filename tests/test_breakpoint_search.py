@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from crew import BreakpointSearch, Crew
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_bisect_finds_every_breakpoint(seed):
+    # demand as a step function of the grid index with a few breakpoints
+    rng = np.random.default_rng(seed)
+    n = int(rng.integers(1, 60))
+    cuts = np.sort(rng.choice(n, size=min(n, 4), replace=False))
+    steps = np.eye(len(cuts) + 1, dtype=int)
+    grid_bundles = [steps[np.searchsorted(cuts, k, side="right")] for k in range(n)]
+
+    bs = BreakpointSearch(n)
+    probes = 0
+    while not bs.done:
+        idx = bs.pending()
+        bs.update(idx, [grid_bundles[k] for k in idx])
+        probes += len(idx)
+
+    assert all(np.array_equal(a, b) for a, b in zip(bs.bundles(), grid_bundles))
+    assert probes <= n
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_bisect_regions_match_grid(seed):
+    rng = np.random.default_rng(seed)
+    n_items = 12
+    starts = rng.integers(0, 30, n_items).astype(float)
+    spans = {j: (starts[j], starts[j] + rng.integers(1, 10)) for j in range(n_items)}
+    agent = Crew(0, rng.random(n_items), 1.0, spans=spans,
+                 conflicts=[(j, k) for j in range(n_items) for k in range(j + 1, n_items)
+                            if spans[j][1] > spans[k][0] and spans[k][1] > spans[j][0]])
+    prices = rng.random(n_items) / 2
+
+    try:
+        grid = agent.compute_budget_subregions(prices, 0.01, 0.5, 1.0, oracle="interval", search="grid")
+        bisect = agent.compute_budget_subregions(prices, 0.01, 0.5, 1.0, oracle="interval", search="bisect")
+    finally:
+        agent.close()
+
+    assert len(grid) == len(bisect)
+    for (b1, s1, e1), (b2, s2, e2) in zip(grid, bisect):
+        assert np.array_equal(b1, b2) and s1 == s2 and e1 == e2
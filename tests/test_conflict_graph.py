@@ -0,0 +1,50 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from conflict_graph import ConflictGraph
+
+
+def random_spans(rng, n_items):
+    starts = rng.integers(0, 100, n_items).astype(float)
+    return {j: (starts[j], starts[j] + rng.integers(1, 30)) for j in range(n_items)}
+
+
+def brute_force_pairs(spans):
+    return sorted((j, k) for j, k in itertools.combinations(range(len(spans)), 2)
+                  if spans[j][1] > spans[k][0] and spans[k][1] > spans[j][0])
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_from_spans_matches_brute_force(seed):
+    rng = np.random.default_rng(seed)
+    spans = random_spans(rng, int(rng.integers(1, 60)))
+    graph = ConflictGraph.from_spans(spans)
+    pairs = brute_force_pairs(spans)
+
+    assert sorted(graph.pairs()) == pairs
+    assert graph.pairs() == ConflictGraph.from_pairs(len(spans), pairs).pairs()
+
+    # cliques are cliques, cover every edge, and none contains another
+    edges = set(pairs)
+    covered = set()
+    sets = [set(c.tolist()) for c in graph.cliques]
+    for clique in sets:
+        inside = set(itertools.combinations(sorted(clique), 2))
+        assert inside <= edges
+        covered |= inside
+    assert covered == edges
+    assert not any(a < b for a in sets for b in sets)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_valid_rows_match_pair_scan(seed):
+    rng = np.random.default_rng(seed)
+    spans = random_spans(rng, 40)
+    graph = ConflictGraph.from_spans(spans)
+    bundles = (rng.random((50, 40)) < 0.08).astype(int)
+
+    expected = [not any(b[j] and b[k] for j, k in graph.pairs()) for b in bundles]
+    assert graph.valid_rows(bundles).tolist() == expected
+    assert [graph.valid(b) for b in bundles] == expected
@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+
+from conflict_graph import ConflictGraph
+from demand_pool import build_knapsack_model, knapsack_solve
+from interval_demand import IntervalDemandOracle
+
+
+def random_market(rng, n_items):
+    starts = rng.integers(0, 40, n_items).astype(float)
+    spans = {j: (starts[j], starts[j] + rng.integers(1, 12)) for j in range(n_items)}
+    return rng.random(n_items), rng.random(n_items), spans
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_interval_oracle_matches_mip(seed):
+    rng = np.random.default_rng(seed)
+    utilities, prices, spans = random_market(rng, 15)
+    oracle = IntervalDemandOracle(utilities, spans)
+    m, x, budget_constr = build_knapsack_model(utilities, ConflictGraph.from_spans(spans))
+
+    budgets = np.sort(rng.uniform(0, 2, 6))
+    for budget, bundle in zip(budgets, oracle.solve_many(prices, budgets)):
+        expected = knapsack_solve(m, x, budget_constr, len(utilities), prices, budget)
+        # random utilities make the optimum unique
+        assert np.array_equal(bundle, expected)
+    m.dispose()
@@ -0,0 +1,43 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from line_builder import greedy_pack, make_buckets
+
+
+def reference_greedy(start, end, weights, buckets):
+    """Notebook candidate greedy: score every disjoint triple, take best-first."""
+    def disjoint(a, b):
+        return end[a] <= start[b] or end[b] <= start[a]
+
+    candidates = []
+    for p in itertools.product(*buckets):
+        if disjoint(p[0], p[1]) and disjoint(p[0], p[2]) and disjoint(p[1], p[2]):
+            w = weights[list(p)]
+            e = end[list(p)]
+            score = (-(abs(w[0] - w[1]) + abs(w[0] - w[2]) + abs(w[1] - w[2]))
+                     - 1e-6 * (e.sum() - 3 * e.min()) * 60.0)
+            candidates.append((score, p))
+
+    used = set()
+    chosen = []
+    for score, p in sorted(candidates, key=lambda c: -c[0]):
+        if used.isdisjoint(p):
+            used.update(p)
+            chosen.append(p)
+    return sorted(chosen)
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("max_per_pairing", [1, 3, 256])
+def test_greedy_pack_matches_full_candidate_greedy(seed, max_per_pairing):
+    rng = np.random.default_rng(seed)
+    n = 24
+    start = rng.uniform(0, 30 * 1440, n)
+    end = start + rng.uniform(600, 4 * 1440, n)
+    weights = rng.normal(size=n)
+    buckets = make_buckets(weights)
+
+    triples, _ = greedy_pack(start, end, weights, buckets, max_per_pairing=max_per_pairing)
+    assert sorted(map(tuple, triples.tolist())) == reference_greedy(start, end, weights, buckets)